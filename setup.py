@@ -19,6 +19,5 @@ setup(
     license='BSD',
     keywords=['ini', 'settings', 'config', 'configure', 'configuration'],
     py_modules=['zini'],
-    install_requires=["python-dateutil"],
     tests_require=['pytest'],
 )
@@ -0,0 +1,162 @@
+from timeit import timeit
+
+import zini
+
+
+def bench(name, func, number=1000):
+    """ Run `func` and report timing (visible with `py.test -s`).
+    """
+    elapsed = timeit(func, number=number)
+    print("\n{}: {:.3f} us per call".format(name, elapsed / number * 1e6))
+    return elapsed
+
+
+def test_bench_timedelta():
+    parser = zini.TimedeltaParser()
+    token = [(0, 'timeout = 1h30m15s')]
+
+    assert parser(token) == zini.parse_timedelta('1h30m15s')
+    bench('timedelta', lambda: parser(token))
+
+
+def test_bench_boolean():
+    parser = zini.BooleanParser()
+    token = [(0, 'enabled = true')]
+
+    assert parser(token) is True
+    bench('boolean', lambda: parser(token))
+
+
+def test_bench_generic_cascade():
+    parser = zini.GenericParser()
+    token = [(0, 'enabled = none')]
+
+    assert parser(token) is None
+    bench('generic cascade', lambda: parser(token))
+
+
+def make_wide_content(sections=20, keys=100, items=100):
+    lines = []
+    for section in range(sections):
+        lines.append('[section{}]'.format(section))
+        lines.extend('key{0} = {0}'.format(i) for i in range(keys))
+        lines.append('list =')
+        lines.extend('    "item {}"'.format(i) for i in range(items))
+        lines.append('# comment')
+        lines.append('')
+
+    return '\n'.join(lines)
+
+
+def old_tokenize(lines):
+    """ Tokenizer of zini 1.1.0 with `list.pop(0)`, for comparison.
+    """
+    lines = lines.copy()
+
+    while lines:
+        n, line = lines.pop(0)
+        if not line.strip():
+            continue
+
+        token_indent = zini.get_indent(line)
+        token = [(n, line)]
+
+        if len(lines) > 1:
+            block_indent = zini.get_indent(lines[0][1])
+
+            if block_indent > token_indent:
+                while lines:
+                    n, line = lines[0]
+                    if line.strip():
+                        indent = zini.get_indent(line)
+                    else:
+                        indent = block_indent
+
+                    if indent <= token_indent:
+                        break
+                    elif token_indent < indent < block_indent:
+                        raise zini.ParseError(n, line)
+
+                    token.append((n, line))
+                    del lines[0]
+
+        yield zini.strip_token(token)
+
+
+def old_get_keyvalue(token):
+    n, line = token[0]
+    key, value = (i.strip() for i in line.split('=', 1))
+    return zini.KeyValue(key, value)
+
+
+def test_bench_tokenize():
+    content = make_wide_content()
+    sections = list(zini.tokenize_sections(enumerate(content.split('\n'))))
+
+    for section_key, section_token in sections:
+        assert (list(zini.tokenize(section_token)) ==
+                list(old_tokenize(section_token)))
+
+    def run(tokenize, get_keyvalue):
+        lines = enumerate(content.split('\n'))
+        for section_key, section_token in zini.tokenize_sections(lines):
+            for token in tokenize(section_token):
+                # a parser of a key splits the line for check and value
+                get_keyvalue(token)
+                get_keyvalue(token)
+
+    bench('tokenize before', lambda: run(old_tokenize, old_get_keyvalue),
+          number=5)
+    bench('tokenize after',
+          lambda: run(zini.tokenize, zini.get_keyvalue), number=5)
+
+
+def test_bench_projection():
+    content = make_wide_content(sections=5, keys=1000, items=10)
+    z = zini.Zini()
+    projection = ['section{}.key{}'.format(s, k)
+                  for s in range(5) for k in range(5)]
+
+    res = z.parse(content, projection=projection)
+    assert res['section0'] == {'key{0}'.format(i): i for i in range(5)}
+
+    bench('parse wide sections', lambda: z.parse(content), number=1)
+    bench('parse wide sections with projection',
+          lambda: z.parse(content, projection=projection), number=1)
+
+
+def test_bench_datetime_list():
+    values = ['2005-01-{:02} 18:{:02}:00+03:00'.format(i % 28 + 1, i % 60)
+              for i in range(10000)]
+    parser = zini.DatetimeParser()
+
+    def per_item():
+        res = []
+        for value in values:
+            parser.check_value(value)
+            res.append(parser.parse_value(value))
+        return res
+
+    assert parser.parse_values(values) == per_item()
+
+    bench('datetime list per item', per_item, number=1)
+    bench('datetime list bulk', lambda: parser.parse_values(values), number=1)
+    bench('datetime list epoch',
+          lambda: parser.parse_values(values, as_array=True), number=1)
+
+
+def test_bench_text_block():
+    blob_lines = ['{:064x}'.format(i) for i in range(16384)]  # ~1MB
+    text_content = '[first]\nblob = |\n' + '\n'.join(
+        '    ' + line for line in blob_lines)
+    list_content = '[first]\nblob =\n' + '\n'.join(
+        '    "' + line + '"' for line in blob_lines)
+
+    z = zini.Zini(first={'blob': zini.Text})
+    assert z.parse(text_content)['first']['blob'] == '\n'.join(blob_lines)
+
+    zl = zini.Zini(first={'blob': [str]})
+    bench('1MB text block', lambda: z.parse(text_content), number=1)
+    bench('1MB list of strings with join',
+          lambda: '\n'.join(zl.parse(list_content)['first']['blob']),
+          number=1)
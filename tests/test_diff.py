@@ -0,0 +1,91 @@
+import zini
+
+OLD = """\
+[first]
+a = 1
+b = 2
+
+[second]
+c = 3
+
+[third]
+d = 4
+"""
+
+NEW = """\
+[first]
+a = 1
+b = 20
+e = 5
+
+[second]
+# comment
+c = 3
+
+[fourth]
+# comment
+f = 6
+"""
+
+
+def parse(content):
+    source = zini.Source()
+    result = zini.Zini().parse(content, source=source)
+    return result, source
+
+
+def test_diff():
+    old, old_source = parse(OLD)
+    new, new_source = parse(NEW)
+    changes = zini.diff(old, new, old_source, new_source)
+
+    assert sorted(changes) == sorted([
+        zini.Change('removed', 'third', None, {'d': 4}, None, 7),
+        zini.Change('added', 'fourth', None, None, {'f': 6}, 9),
+        zini.Change('changed', 'first', 'b', 2, 20, 2),
+        zini.Change('added', 'first', 'e', None, 5, 3),
+    ])
+
+
+def test_diff__without_source():
+    old, old_source = parse(OLD)
+    new, new_source = parse(NEW)
+    changes = zini.diff(old, new)
+
+    assert {(c.kind, c.section, c.key, c.line) for c in changes} == {
+        ('removed', 'third', None, None),
+        ('added', 'fourth', None, None),
+        ('changed', 'first', 'b', None),
+        ('added', 'first', 'e', None),
+    }
+
+
+def test_diff__skip_same_hash():
+    old, old_source = parse(OLD)
+    new, new_source = parse(OLD)
+    new['second']['c'] = 'not compared'
+
+    assert zini.diff(old, new, old_source, new_source) == []
+    assert zini.diff(old, new) != []
+
+
+def test_diff__removed_key():
+    old, old_source = parse('[first]\na = 1\nb = 2\n')
+    new, new_source = parse('[first]\na = 1\n')
+
+    assert zini.diff(old, new, old_source, new_source) == [
+        zini.Change('removed', 'first', 'b', 2, None, 2),
+    ]
+
+
+def test_diff__tables():
+    z = zini.Zini()
+    z.add_table('hosts', r'host-\d+')
+    old = z.parse('[host-1]\nport = 1\n')
+    new = z.parse('[host-1]\nport = 2\n')
+
+    changes = zini.diff(old, new)
+    assert [(c.kind, c.section, c.key) for c in changes] == [
+        ('changed', 'hosts', None),
+    ]
+    assert zini.diff(old, old) == []
@@ -0,0 +1,144 @@
+import pytest
+
+import zini
+
+CONTENT = """\
+# comment
+[first]
+string = "some string"  
+integer = 13
+list =
+    1
+    2
+
+[second]
+; comment
+name = "ünïcode"
+last = true
+"""
+
+
+@pytest.fixture
+def path(tmpdir):
+    path = tmpdir.join('test.ini')
+    path.write_binary(CONTENT.encode('utf-8'))
+    return str(path)
+
+
+@pytest.fixture
+def scheme():
+    return zini.Zini(first={'integer': int, 'list': [int]})
+
+
+def read(path):
+    with open(path, 'rb') as f:
+        return f.read().decode('utf-8')
+
+
+def test_set_same_length(path, scheme):
+    result = scheme.read(path)
+    editor = zini.Editor(scheme, path, result=result)
+
+    assert editor.set('first', 'integer', '42') == 42
+    assert read(path) == CONTENT.replace('integer = 13', 'integer = 42')
+    assert result['first']['integer'] == 42
+    assert scheme.read(path) == result
+
+
+def test_set_other_length(path, scheme):
+    editor = zini.Editor(scheme, path)
+    editor.set('first', 'string', '"short"')
+    editor.set('first', 'list', '\n    3\n    4\n    5')
+    editor.set('second', 'name', '"ö"')
+    editor.set('second', 'last', 'false')
+
+    expected = (CONTENT
+                .replace('"some string"', '"short"')
+                .replace('    1\n    2', '    3\n    4\n    5')
+                .replace('"ünïcode"', '"ö"')
+                .replace('last = true', 'last = false'))
+    assert read(path) == expected
+    assert scheme.read(path)['second'] == {'name': 'ö', 'last': False}
+
+
+@pytest.mark.parametrize('key, value', [
+    ('integer', '"string"'),
+    ('list', '"string"'),
+    ('integer', '1\n2'),
+])
+def test_set_bad_value(path, scheme, key, value):
+    editor = zini.Editor(scheme, path)
+
+    with pytest.raises(zini.ParseError):
+        editor.set('first', key, value)
+
+    assert read(path) == CONTENT
+
+
+def test_set_unknown_key(path, scheme):
+    editor = zini.Editor(scheme, path)
+
+    with pytest.raises(KeyError):
+        editor.set('first', 'unknown', '1')
+
+
+def test_get_offsets(path, scheme):
+    editor = zini.Editor(scheme, path)
+    start, end = editor.get_offsets('first', 'integer')
+    assert CONTENT.encode('utf-8')[start:end] == b'integer = 13'
+
+
+TABLE_CONTENT = """\
+[host-1]
+name = "a"
+port = 8001
+
+[host-2]
+port = 8002
+"""
+
+
+@pytest.fixture
+def table_path(tmpdir):
+    path = tmpdir.join('hosts.ini')
+    path.write_binary(TABLE_CONTENT.encode('utf-8'))
+    return str(path)
+
+
+@pytest.fixture
+def table_scheme():
+    z = zini.Zini()
+    z.add_table('hosts', r'host-\d+', {'port': int})
+    return z
+
+
+def test_set_table(table_path, table_scheme):
+    result = table_scheme.read(table_path)
+    editor = zini.Editor(table_scheme, table_path, result=result)
+
+    assert editor.set('host-2', 'port', '9002') == 9002
+    assert editor.set('host-1', 'name', '"b"') == 'b'
+    assert list(result['hosts']['port']) == [8001, 9002]
+    assert result['hosts']['name'] == ['b', None]
+    assert table_scheme.read(table_path) == result
+
+
+@pytest.mark.parametrize('value', ['"x"', '99999999999999999999'])
+def test_set_table_bad_value(table_path, table_scheme, value):
+    result = table_scheme.read(table_path)
+    editor = zini.Editor(table_scheme, table_path, result=result)
+
+    with pytest.raises(zini.ParseError):
+        editor.set('host-1', 'port', value)
+
+    assert read(table_path) == TABLE_CONTENT
+    assert list(result['hosts']['port']) == [8001, 8002]
+
+
+def test_set_not_in_result(path, scheme):
+    result = scheme.read(path, projection=['first'])
+    editor = zini.Editor(scheme, path, result=result)
+
+    assert editor.set('second', 'last', 'false') is False
+    assert result == scheme.read(path, projection=['first'])
+    assert scheme.read(path)['second']['last'] is False
@@ -0,0 +1,93 @@
+import pytest
+
+import zini
+
+
+def parse(content):
+    z = zini.Zini()
+    z.interpolation = True
+    return z.parse(content)
+
+
+def test_interpolate():
+    res = parse("""\
+[paths]
+base = "/srv/${app:name}"
+logs = "${paths:base}/logs"
+price = "$$13"
+
+[app]
+name = "zini"
+port = 8080
+hosts =
+    "${app:name}-1:${app:port}"
+    -
+        "${paths:logs}"
+""")
+    assert res == {
+        'paths': {
+            'base': '/srv/zini',
+            'logs': '/srv/zini/logs',
+            'price': '$13',
+        },
+        'app': {
+            'name': 'zini',
+            'port': 8080,
+            'hosts': ['zini-1:8080', ['/srv/zini/logs']],
+        },
+    }
+
+
+def test_interpolate__disabled():
+    res = zini.Zini().parse('[a]\nb = "${a:c}"\n')
+    assert res == {'a': {'b': '${a:c}'}}
+
+
+@pytest.mark.parametrize('content', [
+    '[a]\nb = "${a:b}"\n',
+    '[a]\nb = "${a:c}"\nc = "${a:d}"\nd = "${a:b}"\n',
+])
+def test_interpolate__cycle(content):
+    with pytest.raises(zini.InterpolationError):
+        parse(content)
+
+
+def test_interpolate__table():
+    z = zini.Zini(p={'b': 'base'})
+    z.add_table('hosts', r'host-\d+', {'name': str, 'port': int})
+    z.interpolation = True
+    res = z.parse("""\
+[host-1]
+name = "${p:b}-1"
+port = 8001
+
+[host-2]
+port = 8002
+""")
+    assert res['hosts']['name'] == ['base-1', None]
+    assert list(res['hosts']['port']) == [8001, 8002]
+
+
+def test_interpolate__unknown():
+    with pytest.raises(zini.InterpolationError) as exc:
+        parse('[a]\nb = "${a:c}"\n')
+
+    assert (exc.value.section, exc.value.key) == ('a', 'b')
+
+
+def test_interpolate__long_chain():
+    lines = ['[a]', 'k0 = "x"']
+    lines.extend('k{} = "${{a:k{}}}"'.format(i, i - 1) for i in range(1, 5000))
+    res = parse('\n'.join(lines))
+    assert res['a']['k4999'] == 'x'
+
+
+def test_interpolate__diff():
+    z = zini.Zini()
+    z.interpolation = True
+    old_source, new_source = zini.Source(), zini.Source()
+    old = z.parse('[a]\nb = "${c:d}"\n[c]\nd = "1"\n', source=old_source)
+    new = z.parse('[a]\nb = "${c:d}"\n[c]\nd = "2"\n', source=new_source)
+
+    changes = zini.diff(old, new, old_source, new_source)
+    assert {(c.section, c.key) for c in changes} == {('a', 'b'), ('c', 'd')}
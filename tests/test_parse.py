@@ -135,3 +135,238 @@ def test_parse_list__set_item_parser__bad_type():
     ]
     with pytest.raises(zini.ParseError):
         zini.ListParser(zini.StringParser())(token)
+
+
+@pytest.mark.parametrize('value, result', [
+    ('1w', timedelta(weeks=1)),
+    ('1ms', timedelta(milliseconds=1)),
+    ('1m1ms', timedelta(minutes=1, milliseconds=1)),
+    ('1w1d1h1m1s1ms', timedelta(milliseconds=694861001)),
+])
+def test_parse_timedelta(value, result):
+    assert zini.parse_timedelta(value) == result
+
+
+@pytest.mark.parametrize('value', ['', 'ms', '1', '1m1h', '1s1s', '1x', '1 s'])
+def test_parse_timedelta__bad(value):
+    with pytest.raises(ValueError):
+        zini.parse_timedelta(value)
+
+
+def test_values_cache():
+    first = zini.TimedeltaParser()([(0, 'td = 1h')])
+    second = zini.GenericParser()([(0, 'td = 1h')])
+    assert first is second
+
+
+def test_parse_list__nested():
+    token = [
+        (0, 'key ='),
+        (1, '  "a"'),
+        (2, '  -'),
+        (3, '    1'),
+        (4, '    -'),
+        (5, '      true'),
+        (6, '  2'),
+    ]
+    res = zini.ListParser()(token)
+    assert res == ['a', [1, [True]], 2]
+
+
+def test_parse_list__nested_typed():
+    token = [
+        (0, 'matrix ='),
+        (1, '  -'),
+        (2, '    1'),
+        (3, '    2'),
+        (4, '  -'),
+        (5, '    3'),
+        (6, '    4'),
+    ]
+    res = zini.ListParser(default=[[int]])(token)
+    assert res == [[1, 2], [3, 4]]
+
+
+@pytest.mark.parametrize('kwargs', [
+    {'default': [zini.Text]},
+    {'default': [[zini.Text]]},
+    {'item_parser': zini.TextParser()},
+    {'item_parser': zini.GenericParser()},
+])
+def test_parse_list__bad_item_parser(kwargs):
+    with pytest.raises(TypeError):
+        zini.ListParser(**kwargs)
+
+    if 'default' in kwargs:
+        with pytest.raises(TypeError):
+            zini.Zini(a={'x': kwargs['default']})
+
+
+def test_parse_list__as_array():
+    token = [
+        (0, 'matrix ='),
+        (1, '  -'),
+        (2, '    1.5'),
+        (3, '  -'),
+        (4, '    3'),
+    ]
+    res = zini.ListParser(default=[[float]], as_array=True)(token)
+    assert [i.typecode for i in res] == ['d', 'd']
+    assert [list(i) for i in res] == [[1.5], [3.0]]
+
+
+def test_parse_list__as_array__bad_type():
+    with pytest.raises(TypeError):
+        zini.ListParser(default=[str], as_array=True)
+
+
+@pytest.mark.parametrize('lines', [
+    ['  -', '    1', '   2'],
+    ['  -', '  1'],
+    ['  1', '    2'],
+    ['  1', '  -'],
+])
+def test_parse_list__nested_bad(lines):
+    token = [(0, 'key =')] + list(enumerate(lines, start=1))
+    with pytest.raises(zini.ParseError):
+        zini.ListParser()(token)
+
+
+@pytest.mark.parametrize('lines', [
+    ['  1', '  2'],
+    ['  -', '    "a"'],
+])
+def test_parse_list__nested_typed_bad(lines):
+    token = [(0, 'key =')] + list(enumerate(lines, start=1))
+    with pytest.raises(zini.ParseError):
+        zini.ListParser(default=[[int]])(token)
+
+
+@pytest.mark.parametrize('value, result', [
+    ('2005-01-13', datetime(2005, 1, 13)),
+    ('2005-01-13 18:05', datetime(2005, 1, 13, 18, 5)),
+    ('2005-01-13T18:05:01.5', datetime(2005, 1, 13, 18, 5, 1, 500000)),
+    ('2005-01-13 18:05:01.1234567',
+        datetime(2005, 1, 13, 18, 5, 1, 123456)),
+    ('2005-01-13 18:05z', datetime(2005, 1, 13, 18, 5, tzinfo=timezone.utc)),
+    ('2005-01-13 18:05 +03:30',
+        datetime(2005, 1, 13, 18, 5,
+                 tzinfo=timezone(timedelta(hours=3, minutes=30)))),
+    ('2005-01-13 18:05-03', datetime(2005, 1, 13, 21, 5, tzinfo=timezone.utc)),
+])
+def test_parse_datetime(value, result):
+    assert zini.parse_datetime(value) == result
+    epoch = datetime(1970, 1, 1, tzinfo=timezone.utc)
+    if result.tzinfo is None:
+        result = result.replace(tzinfo=timezone.utc)
+    assert zini.parse_datetimes([value], epoch=True) == [
+        (result - epoch) // timedelta(microseconds=1)]
+
+
+@pytest.mark.parametrize('value', [
+    '2005-01-13Z',
+    '2005-13-01',
+    '2005-01-13 24:00',
+    '2005-01-13 15:00+03:00Z',
+    '2005-01-13 15:00+25',
+])
+def test_parse_datetime__bad(value):
+    with pytest.raises(ValueError):
+        zini.parse_datetime(value)
+
+    with pytest.raises(ValueError):
+        zini.parse_datetimes(['2005-01-13', value])
+
+    with pytest.raises(ValueError):
+        zini.parse_datetimes([value], epoch=True)
+
+
+def test_parse_datetime__match_once(monkeypatch):
+    matches = []
+
+    class Pattern:
+        def match(self, value):
+            matches.append(value)
+            return pattern.match(value)
+
+    pattern = zini.RE_DATETIME
+    monkeypatch.setattr(zini, 'RE_DATETIME', Pattern())
+
+    token = [(0, 'dt = 2005-01-13 18:00Z')]
+    res = zini.DatetimeParser()(token)
+    assert res == datetime(2005, 1, 13, 18, 0, tzinfo=timezone.utc)
+    assert matches == ['2005-01-13 18:00Z']
+
+
+def test_parse_list__datetime():
+    token = [
+        (0, 'key ='),
+        (1, '  2005-01-13 18:00+03:00'),
+        (2, '  2005-01-14 18:00+03:00'),
+    ]
+    res = zini.ListParser(default=[datetime])(token)
+    assert res == [
+        datetime(2005, 1, 13, 15, 0, tzinfo=timezone.utc),
+        datetime(2005, 1, 14, 15, 0, tzinfo=timezone.utc),
+    ]
+    assert res[0].tzinfo is res[1].tzinfo
+
+
+def test_parse_list__datetime_as_array():
+    token = [
+        (0, 'key ='),
+        (1, '  1970-01-01 00:00:01Z'),
+        (2, '  1970-01-02'),
+    ]
+    res = zini.ListParser(default=[datetime], as_array=True)(token)
+    assert res.typecode == 'q'
+    assert list(res) == [1000000, 86400000000]
+
+
+def test_parse_list__datetime_bad():
+    token = [
+        (0, 'key ='),
+        (1, '  2005-01-13'),
+        (2, '  2005-13-01'),
+        (3, '  2005-01-13'),
+    ]
+    with pytest.raises(zini.ParseError) as exc:
+        zini.ListParser(default=[datetime])(token)
+
+    assert exc.value.n == 2
+
+
+@pytest.mark.parametrize('lines, text', [
+    ([], ''),
+    (['    line 1', '    line 2'], 'line 1\nline 2'),
+    (['  a', '', '    b', '  c'], 'a\n\n  b\nc'),
+    (['  a', ' ', '  b  '], 'a\n\nb  '),
+])
+def test_parse_text(lines, text):
+    token = [(0, 'key = |')] + list(enumerate(lines, start=1))
+    assert zini.TextParser()(token) == text
+    assert zini.GenericParser()(token) == text
+
+
+def test_parse_text__bad():
+    with pytest.raises(zini.ParseError):
+        zini.TextParser()([(0, 'key = "text"')])
+
+
+def test_parse_text__section():
+    z = zini.Zini(first={'sql': zini.Text})
+    assert isinstance(z['first']['sql'], zini.TextParser)
+
+    res = z.parse('[first]\nsql = |\n    SELECT *\n      FROM t\n\nnext = 1\n')
+    assert res == {'first': {'sql': 'SELECT *\n  FROM t', 'next': 1}}
+
+
+@pytest.mark.parametrize('content, text', [
+    ('t = |\n    line one  \n    line two\t', 'line one  \nline two\t'),
+    ('t = |\n    a\n  \n      \n    b \n\nx = 1', 'a\n\n  \nb '),
+    ('t = |\n    a \n# comment\n    b \n', 'a \nb '),
+])
+def test_parse_text__verbatim(content, text):
+    z = zini.Zini(first={'t': zini.Text})
+    assert z.parse('[first]\n' + content)['first']['t'] == text
+    assert z.parse('[first]\n' + content, lazy=True)['first']['t'] == text
@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 
 import pytest
 
@@ -68,6 +68,10 @@ def test_set_default(value, parser_class):
     ([str], zini.StringParser),
     ([int], zini.IntegerParser),
     ([datetime], zini.DatetimeParser),
+    ([bool], zini.BooleanParser),
+    ([float], zini.FloatParser),
+    ([timedelta], zini.TimedeltaParser),
+    ([[int]], zini.ListParser),
 ])
 def test_set_list_item_parser(value, item_parser_class):
     s = zini.Section()
@@ -89,3 +93,125 @@ def test_set_bad_key():
 
     with pytest.raises(TypeError):
         s[13] = int
+
+
+def test_update():
+    s = zini.Section()
+    s.update({'a': int, 'b': 'str'}, c=zini.BooleanParser())
+    assert isinstance(s['a'], zini.IntegerParser)
+    assert s['b'].default == 'str'
+    assert isinstance(s['c'], zini.BooleanParser)
+
+    with pytest.raises(TypeError):
+        s.update({13: int})
+
+    s.freeze()
+    with pytest.raises(TypeError):
+        s.update(d=int)
+
+
+class Port(int):
+    pass
+
+
+class PortParser(zini.IntegerParser):
+    pass
+
+
+def test_registry_lookup():
+    registry = zini.ParserRegistry(zini.registry)
+    assert registry.lookup(Port) is zini.IntegerParser
+    assert registry.lookup(object) is None
+
+    registry.register(Port, PortParser)
+    assert registry.lookup(Port) is PortParser
+    assert registry.lookup(int) is zini.IntegerParser
+
+    generic = registry.get_generic_parsers(one_line=True)
+    assert [type(p) for p in generic][-1] is PortParser
+    assert not any(isinstance(p, zini.ListParser) for p in generic)
+
+
+def test_registry_bad_register():
+    registry = zini.ParserRegistry()
+
+    with pytest.raises(TypeError):
+        registry.register(13, zini.IntegerParser)
+
+    with pytest.raises(TypeError):
+        registry.register(int, int)
+
+
+def test_section_registry():
+    class PortSection(zini.Section):
+        parsers = zini.ParserRegistry(zini.registry)
+
+    PortSection.parsers.register(Port, PortParser)
+
+    s = PortSection({'port': Port, 'i': int})
+    assert isinstance(s['port'], PortParser)
+    assert type(s['i']) is zini.IntegerParser
+    assert type(zini.Section({'port': Port})['port']) is zini.IntegerParser
+
+
+def test_section_registry__nested():
+    class PortSection(zini.Section):
+        parsers = zini.ParserRegistry(zini.registry)
+
+    PortSection.parsers.register(Port, PortParser)
+
+    s = PortSection({'ports': [Port], 'matrix': [[Port]], 'list': []})
+    assert type(s['ports'].item_parser) is PortParser
+    assert type(s['matrix'].item_parser.item_parser) is PortParser
+
+    generic = s.get_default_parser().get_parsers()
+    assert type(generic[-1]) is PortParser
+
+    item_parser = s['list'].item_parser
+    assert item_parser.get_parsers()[-1].__class__ is PortParser
+
+
+def test_section_parsers_list():
+    class PortSection(zini.Section):
+        parsers = [
+            (Port, PortParser),
+            (int, zini.IntegerParser),
+            (list, zini.ListParser),
+        ]
+
+    s = PortSection({'port': Port, 'i': 1, 'ports': [Port]})
+    assert isinstance(s.parsers, zini.ParserRegistry)
+    assert type(s['port']) is PortParser
+    assert type(s['i']) is zini.IntegerParser
+    assert type(s['ports'].item_parser) is PortParser
+    assert type(PortSection.parsers) is list
+
+
+def test_generic_parsers_list():
+    class IntegerOnlyParser(zini.GenericParser):
+        parsers = [zini.IntegerParser]
+
+    class IntegerOnlySection(zini.Section):
+        default_parser_class = IntegerOnlyParser
+
+    s = IntegerOnlySection()
+    assert s([(0, 'a = 1')]) == {'a': 1}
+
+    parser = s.get_default_parser()
+    assert [type(p) for p in parser.get_parsers()] == [zini.IntegerParser]
+    assert parser.get_parsers() is parser.get_parsers()
+
+    parser.freeze()
+    assert [type(p) for p in parser.get_parsers()] == [zini.IntegerParser]
+
+    with pytest.raises(zini.ParseError):
+        s([(0, 'a = "1"')])
+
+    class IntegerItemParser(zini.GenericListItemParser):
+        parsers = [zini.IntegerParser]
+
+    parser = zini.ListParser(IntegerItemParser())
+    assert parser([(0, 'a ='), (1, '  1')]) == [1]
+
+    with pytest.raises(zini.ParseError):
+        parser([(0, 'a ='), (1, '  "1"')])
@@ -0,0 +1,148 @@
+import threading
+
+import pytest
+
+import zini
+
+
+def make_content(version, keys=20):
+    lines = ['[first]']
+    lines.extend('k{} = {}'.format(i, version) for i in range(keys))
+    lines.append('[second]')
+    lines.append('version = {}'.format(version))
+    return '\n'.join(lines)
+
+
+def test_holder():
+    holder = zini.SnapshotHolder(zini.Zini(first={'k0': 0}))
+    assert holder.snapshot == (0, {'first': {'k0': 0}})
+    assert holder.zini.frozen
+
+    snapshot = holder.parse(make_content(1, keys=1))
+    assert snapshot.version == 1
+    assert holder.result == {'first': {'k0': 1}, 'second': {'version': 1}}
+
+
+def test_holder_parse_error():
+    holder = zini.SnapshotHolder(zini.Zini())
+    holder.parse(make_content(1))
+
+    with pytest.raises(zini.ParseError):
+        holder.parse('[first]\nbad\n')
+
+    assert holder.snapshot.version == 1
+
+
+def test_holder_stress():
+    holder = zini.SnapshotHolder(zini.Zini(first={'k0': int}), typed=True)
+    holder.parse(make_content(0))
+    stop = threading.Event()
+    errors = []
+
+    def reader():
+        while not stop.is_set():
+            version, result = holder.snapshot
+            values = set(result['first'].values())
+            values.add(result.second.version)
+            if len(values) != 1:  # pragma: no cover
+                errors.append(values)
+
+    def writer(start):
+        for version in range(start, start + 25):
+            holder.parse(make_content(version))
+
+    readers = [threading.Thread(target=reader) for _ in range(16)]
+    writers = [threading.Thread(target=writer, args=(i * 100,))
+               for i in range(4)]
+
+    for thread in readers + writers:
+        thread.start()
+
+    for thread in writers:
+        thread.join()
+
+    stop.set()
+
+    for thread in readers:
+        thread.join()
+
+    assert not errors
+    assert holder.snapshot.version == 101
+
+
+def test_history():
+    holder = zini.SnapshotHolder(zini.Zini(), history=3)
+    holder.parse(make_content(1))
+    holder.parse(make_content(2))
+    holder.parse(make_content(3))
+    assert holder.versions == [1, 2, 3]
+
+    snapshot = holder.rollback()
+    assert snapshot.version == 4
+    assert snapshot.result['second'] == {'version': 2}
+    assert holder.versions == [2, 3, 4]
+
+    snapshot = holder.rollback(3)
+    assert snapshot.result['second'] == {'version': 3}
+
+    with pytest.raises(KeyError):
+        holder.rollback(1)
+
+
+def test_history__rollback_twice():
+    holder = zini.SnapshotHolder(zini.Zini(), history=5)
+    for version in range(1, 4):
+        holder.parse(make_content(version))
+
+    assert holder.rollback().result['second'] == {'version': 2}
+    assert holder.rollback().result['second'] == {'version': 1}
+    assert holder.versions == [1, 2, 3, 4, 5]
+
+    with pytest.raises(IndexError):
+        holder.rollback()
+
+    holder.parse(make_content(6))
+    assert holder.rollback().result['second'] == {'version': 1}
+
+
+def test_history__shared_sections():
+    holder = zini.SnapshotHolder(zini.Zini(), history=2)
+    first = holder.parse('[a]\nx = 1\n[b]\ny = 1\n').result
+    second = holder.parse('[a]\nx = 1\n[b]\ny = 2\n').result
+    assert second['a'] is first['a']
+    assert second['b'] is not first['b']
+
+
+def test_history__size():
+    holder = zini.SnapshotHolder(zini.Zini(), history=10)
+    holder.parse(make_content(1))
+    size = holder.history_size
+    assert size > 0
+
+    holder.parse(make_content(1))
+    assert holder.history_size == size
+
+    holder.parse(make_content(2))
+    assert holder.history_size > size
+
+
+def test_history__bytes_budget():
+    holder = zini.SnapshotHolder(zini.Zini(), history=10)
+    holder.parse(make_content(1))
+    budget = holder.history_size
+
+    holder = zini.SnapshotHolder(zini.Zini(), history=10,
+                                 history_bytes=budget)
+    for version in range(5):
+        holder.parse(make_content(version))
+
+    assert holder.versions == [5]
+    assert holder.history_size <= budget
+
+    with pytest.raises(IndexError):
+        holder.rollback()
+
+
+def test_history__bad_size():
+    with pytest.raises(ValueError):
+        zini.SnapshotHolder(zini.Zini(), history=0)
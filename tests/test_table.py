@@ -0,0 +1,88 @@
+import pytest
+
+import zini
+
+CONTENT = """\
+[common]
+name = "inventory"
+
+[host-0001]
+port = 8001
+weight = 0.5
+address = "10.0.0.1"
+
+[host-0002]
+port = 8002
+address = "10.0.0.2"
+extra = true
+"""
+
+
+def test_parse_table():
+    z = zini.Zini(common={'name': str})
+    z.add_table('hosts', r'host-\d+', {'port': int, 'weight': 1.0})
+    res = z.parse(CONTENT)
+
+    assert res['common'] == {'name': 'inventory'}
+
+    hosts = res['hosts']
+    assert isinstance(hosts, zini.TableResult)
+    assert len(hosts) == 2
+    assert hosts.index == ['host-0001', 'host-0002']
+    assert hosts['port'].typecode == 'q'
+    assert list(hosts['port']) == [8001, 8002]
+    assert list(hosts['weight']) == [0.5, 1.0]
+    assert hosts['address'] == ['10.0.0.1', '10.0.0.2']
+    assert hosts['extra'] == [None, True]
+    assert hosts.row('host-0002') == {
+        'port': 8002,
+        'weight': 1.0,
+        'address': '10.0.0.2',
+        'extra': True,
+    }
+
+
+def test_parse_table__empty():
+    z = zini.Zini()
+    z.add_table('hosts', r'host-\d+')
+    res = z.parse('[other]\na = 1\n')
+    assert res['other'] == {'a': 1}
+    assert len(res['hosts']) == 0
+
+
+def test_parse_table__required():
+    z = zini.Zini()
+    z.add_table('hosts', r'host-\d+', {'port': int})
+
+    with pytest.raises(zini.ParseError):
+        z.parse(CONTENT.replace('port = 8002', ''))
+
+
+def test_parse_table__bad_value():
+    z = zini.Zini()
+    z.add_table('hosts', r'host-\d+', {'port': int})
+
+    with pytest.raises(zini.ParseError):
+        z.parse(CONTENT.replace('port = 8002', 'port = "8002"'))
+
+
+def test_parse_table__projection():
+    z = zini.Zini()
+    z.add_table('hosts', r'host-\d+', {'port': int, 'weight': 1.0})
+    res = z.parse(CONTENT, projection=['hosts.port'])
+    assert list(res) == ['hosts']
+    assert list(res['hosts'].columns) == ['port']
+
+
+def test_add_table__frozen():
+    z = zini.Zini()
+    z.freeze()
+
+    with pytest.raises(TypeError):
+        z.add_table('hosts', r'host-\d+')
+
+
+def test_repr():
+    table = zini.Table(r'host-\d+', {'port': int})
+    assert 'host' in repr(table)
+    assert 'columns' in repr(zini.TableResult())
@@ -99,3 +99,88 @@ def test_identation_error():
     ]
     with pytest.raises(zini.ParseError):
         list(zini.tokenize(lines))
+
+
+def test_tokenize_last_block():
+    lines = [
+        (0, 'key0 = 0'),
+        (1, 'key1 ='),
+        (2, '  1'),
+    ]
+    assert list(zini.tokenize(lines)) == [
+        [(0, 'key0 = 0')],
+        [(1, 'key1 ='), (2, '  1')],
+    ]
+
+
+@pytest.mark.parametrize('line, keyvalue', [
+    ('key = value = 1', ('key', 'value = 1')),
+    ('  key=', ('key', '')),
+    (' = 1', ('', '1')),
+    ('    "item"', None),
+    ('', None),
+])
+def test_split_line(line, keyvalue):
+    assert zini.split_line(line) == keyvalue
+
+
+def test_tokenize__split_once():
+    lines = [(0, 'a = 1'), (1, 'b ='), (2, '  1')]
+    tokens = list(zini.tokenize(lines))
+    assert [t.keyvalue for t in tokens] == [('a', '1'), ('b', '')]
+    assert zini.get_keyvalue(tokens[0]) is tokens[0].keyvalue
+
+
+@pytest.mark.parametrize('scheme', [{}, {'x': int}, {'x': 1.0}])
+def test_parse__split_once(monkeypatch, scheme):
+    lines = []
+
+    def split_line(line):
+        lines.append(line)
+        return split(line)
+
+    split = zini.split_line
+    monkeypatch.setattr(zini, 'split_line', split_line)
+
+    zini.Zini(a=scheme).parse('[a]\nx = 1\ny = 1h\n')
+    assert lines == ['x = 1', 'y = 1h']
+
+
+def test_tokenize_sections():
+    lines = enumerate([
+        '',
+        '# comment',
+        '[first]',
+        'a = 1   ',
+        '; comment',
+        '[second]',
+        '[third]',
+        'b = 2',
+    ])
+    headers = {}
+    assert list(zini.tokenize_sections(lines, headers)) == [
+        ('first', [(3, 'a = 1')]),
+        ('third', [(7, 'b = 2')]),
+    ]
+    assert headers == {'first': 2, 'second': 5, 'third': 6}
+
+
+@pytest.mark.parametrize('content', [
+    '',
+    '\n',
+    'a',
+    'a\nb\n',
+    '\n\nabc\n\nd',
+])
+def test_line_index(content):
+    index = zini.LineIndex(content)
+    assert list(index) == list(enumerate(content.split('\n')))
+    assert len(index) == len(content.split('\n'))
+    assert [index.line(n) for n in range(len(index))] == content.split('\n')
+
+
+def test_line_index__bad_line():
+    index = zini.LineIndex('a\nb')
+
+    with pytest.raises(IndexError):
+        index.line(2)
@@ -1,4 +1,5 @@
 import os
+import pickle
 
 import pytest
 
@@ -139,3 +140,223 @@ def test_read_bad():
 def test_repr():
     z = zini.Zini(first={'def': 111}, second={'boolean': False})
     assert '111' in repr(z)
+
+
+def test_parse_typed():
+    content = """\
+[first]
+boolean = false
+integer = 13
+set-key = 1
+
+[unknown]
+items = 2
+"""
+    z = zini.Zini(first={'integer': int, 'def': 111, 'set-key': int})
+    res = z.parse(content, typed=True)
+    assert isinstance(res, zini.Result)
+    assert res.first.integer == 13
+    assert res.first.boolean is False
+    assert res['first']['set-key'] == 1
+    assert res['unknown']['items'] == 2
+    assert res.as_dict() == {
+        'first': {'boolean': False, 'def': 111, 'integer': 13, 'set-key': 1},
+        'unknown': {'items': 2},
+    }
+    assert res == res.as_dict()
+
+
+def test_parse_typed__slots():
+    z = zini.Zini(first={'integer': int, 'items': int})
+    res = z.parse('[first]\nitems = 1\n', typed=True)
+    assert res.first.__slots__ == ('integer',)
+    assert 'integer' not in res.first
+    assert res.first['items'] == 1
+    assert res.first.items() is not None
+
+    with pytest.raises(AttributeError):
+        res.first.integer
+
+    with pytest.raises(KeyError):
+        res.first['integer']
+
+
+def test_defaults_typed():
+    z = zini.Zini()
+    z['first']['int'] = 1
+    z['first']['str'] = str
+
+    res = z.parse('', typed=True)
+    assert res.first.int == 1
+    assert res == {'first': {'int': 1}}
+
+
+def test_result_pickle():
+    z = zini.Zini(first={'a': int, 'b': [int]}, second={'a': str})
+    res = z.parse('[first]\na = 1\nc = 2\n[third]\nx = 3\n', typed=True)
+    assert type(res.first).__module__ == 'zini'
+
+    loaded = pickle.loads(pickle.dumps(res))
+    assert loaded == res
+    assert loaded.first.a == 1
+    assert loaded.first.c == 2
+    assert loaded.third == {'x': 3}
+    assert type(loaded.first).__name__ == 'SectionResult'
+    assert set(type(loaded.first)._fields) == {'a', 'b'}
+
+
+def test_result_class_invalidate():
+    z = zini.Zini()
+    z['first']['a'] = int
+    cls = z['first'].result_class
+    assert cls is z['first'].result_class
+
+    z['first']['b'] = int
+    assert z['first'].result_class.__slots__ == ('a', 'b')
+
+
+def test_freeze():
+    z = zini.Zini(first={'i': int})
+    z.freeze()
+
+    with pytest.raises(TypeError):
+        z['second'] = {}
+
+    with pytest.raises(TypeError):
+        del z['first']
+
+    with pytest.raises(TypeError):
+        z['first']['j'] = int
+
+    with pytest.raises(KeyError):
+        z['second']
+
+    with pytest.raises(TypeError):
+        z.interpolation = True
+
+    with pytest.raises(TypeError):
+        z.tables = {}
+
+    with pytest.raises(TypeError):
+        z.tables['hosts'] = zini.Table('host-.*')
+
+
+class Word(str):
+    pass
+
+
+class WordParser(zini.OneLineParser):
+    def parse_value(self, value):
+        return value
+
+
+def test_freeze__registry():
+    class WordSection(zini.Section):
+        parsers = zini.ParserRegistry(zini.registry)
+
+    z = zini.Zini()
+    z['first'] = WordSection({'items': []})
+    z.freeze()
+
+    WordSection.parsers.register(Word, WordParser)
+    assert zini.Zini(first=WordSection()).parse('[first]\nw = word\n') == {
+        'first': {'w': 'word'}}
+
+    for content in ['[first]\nw = word\n', '[first]\nitems =\n  word\n']:
+        with pytest.raises(zini.ParseError):
+            z.parse(content)
+
+
+def test_parse_unknown_section_not_added():
+    z = zini.Zini()
+    res = z.parse('[first]\ni = 1\n')
+    assert res == {'first': {'i': 1}}
+    assert 'first' not in z
+
+
+@pytest.mark.parametrize('projection', [
+    ['first.integer', 'first.def', 'third'],
+    {'first': ['integer', 'def'], 'third': None},
+])
+def test_parse_projection(projection):
+    content = """\
+[first]
+boolean = bad value
+integer = 13
+
+[second]
+string = "some string"
+
+[third]
+a = 1
+"""
+    z = zini.Zini(first={'def': 111, 'other': 1}, fourth={'i': 1})
+    res = z.parse(content, projection=projection)
+    assert res == {
+        'first': {'def': 111, 'integer': 13},
+        'third': {'a': 1},
+    }
+
+
+def test_make_projection():
+    projection = zini.make_projection(['a.x', 'a.y.z', 'b', 'b.x'])
+    assert projection == {'a': {'x', 'y.z'}, 'b': None}
+
+
+@pytest.mark.parametrize('projection', ['a.x', {'a': 'x'}])
+def test_make_projection__string(projection):
+    with pytest.raises(TypeError):
+        zini.make_projection(projection)
+
+    with pytest.raises(TypeError):
+        zini.Zini(a={'x': 1}).parse('', projection=projection)
+
+
+def test_parse_lazy():
+    content = """\
+[first]
+integer = 13
+dates =
+    2005-01-13
+    2005-01-14
+"""
+    z = zini.Zini(first={'def': 111}, second={'i': 1})
+    res = z.parse(content, lazy=True)
+    first = res['first']
+    assert isinstance(first, zini.LazySection)
+
+    raw = first.get_raw('dates')
+    assert isinstance(raw, zini.LazyValue)
+    assert raw.lines == (2, 4)
+    assert raw.raw == 'dates =\n    2005-01-13\n    2005-01-14'
+
+    assert first['integer'] == 13
+    assert first.get_raw('integer') == 13
+    assert res == z.parse(content)
+
+
+@pytest.mark.parametrize('content', [
+    '[first]\ndate = 2005-13-01\n',
+    '[first]\ndates =\n  2005-01-13\n  2005-02-30\n',
+    '[first]\ni = 1 3\n',
+])
+def test_parse_lazy__errors_at_parse_time(content):
+    z = zini.Zini()
+
+    with pytest.raises(zini.ParseError):
+        z.parse(content, lazy=True)
+
+
+def test_parse_lazy__array_overflow():
+    z = zini.Zini(first={'ids': zini.ListParser(default=[int], as_array=True)})
+    content = '[first]\nids =\n  1\n  99999999999999999999999\n'
+
+    with pytest.raises(zini.ParseError) as exc_info:
+        z.parse(content, lazy=True)
+
+    assert exc_info.value.n == 3
+
+
+def test_parse_lazy__typed():
+    with pytest.raises(ValueError):
+        zini.Zini().parse('', typed=True, lazy=True)
@@ -1,27 +1,44 @@
-from collections.abc import MutableMapping
-from collections import namedtuple
-from datetime import datetime, timedelta
+from array import array
+from calendar import monthrange
+from collections.abc import Mapping, MutableMapping
+from collections import OrderedDict, deque, namedtuple
+from datetime import date, datetime, timedelta, timezone
+from hashlib import sha1
 import re
-
-import dateutil.parser
+import sys
+import threading
+from types import MappingProxyType
 
 __version__ = '1.1.0'
 
 NOT_SET = type('NOT_SET', (), {})
-RE_ISO8601 = re.compile(
-    '^\d\d\d\d-\d\d-\d\d'  # YYYY-MM-DD
-    '(?:[\sT]\d\d:\d\d(?::\d\d(?:\.\d+)?)?'  # [\sT]hh:mm:ss.mmm
-    '(?:\s?[+-]\d\d(?::\d\d)?)?)?(?:[zZ])?$'  # [+-]hh:mm
+RE_DATETIME = re.compile(
+    r'^(\d\d\d\d)-(\d\d)-(\d\d)'  # YYYY-MM-DD
+    r'(?:(?:[^\S\n]|T)(\d\d):(\d\d)(?::(\d\d)(?:\.(\d+))?)?'  # hh:mm:ss.mmm
+    r'(?:[^\S\n]?([+-])(\d\d)(?::(\d\d))?)?)?'  # [+-]hh:mm
+    r'([zZ])?$',
+    re.MULTILINE,
 )
 
-RE_TIMEDELTA = re.compile(
-    '^(?:(?P<weeks>\d+)w)?(?:(?P<days>\d+)d)?'  # w, d
-    '(?:(?P<hours>\d+)h)?(?:(?P<minutes>\d+)m)?'  # h, m
-    '(?:(?P<seconds>\d+)s)?(?:(?P<milliseconds>\d+)ms)?$'  # s, ms
-)
+RE_REFERENCE = re.compile(r'\$(?:\$|\{([^:{}]*):([^{}]*)\})')
+
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+_timezones = {0: timezone.utc}
+
+TIMEDELTA_UNITS = ('w', 'd', 'h', 'm', 's', 'ms')
+
+VALUES_CACHE_SIZE = 4096
+VALUES_CACHE_MAX_LENGTH = 32
+_values_cache = {}
+
+_result_classes = {}
 
 
 KeyValue = namedtuple('KeyValue', ('key', 'value'))
+Snapshot = namedtuple('Snapshot', ('version', 'result'))
+HistoryEntry = namedtuple('HistoryEntry', ('snapshot', 'hashes', 'origin'))
+Change = namedtuple('Change', ('kind', 'section', 'key', 'old', 'new', 'line'))
 
 
 class ParseError(Exception):
@@ -39,9 +56,24 @@ class ParseError(Exception):
             return "error in line {s.n}: {s.line!r}".format(s=self)
 
 
+class InterpolationError(ParseError):
+    def __init__(self, section, key, comment):
+        super().__init__(None, None, comment)
+        self.section = section
+        self.key = key
+
+    def __str__(self):  # pragma: no cover
+        return "error in ${{{s.section}:{s.key}}}: {s.comment}".format(s=self)
+
+
 class Zini(MutableMapping):
     def __init__(self, **sections):
         self._sections = {}
+        self._result_class = None
+        self._default_section = Section()
+        self._tables = {}
+        self._interpolation = False
+        self.frozen = False
 
         for name, data in sections.items():
             self[name] = data
@@ -49,22 +81,35 @@ class Zini(MutableMapping):
     def __getitem__(self, key):
         section = self._sections.get(key)
         if section is None:
+            if self.frozen:
+                raise KeyError(key)
+
             self[key] = section = Section()
 
         return section
 
+    def __contains__(self, key):
+        return key in self._sections
+
     def __setitem__(self, key, value):
-        if not isinstance(key, str):
+        if self.frozen:
+            raise TypeError("scheme is frozen")
+        elif not isinstance(key, str):
             raise TypeError("only strings is allowed for sectors name")
         elif isinstance(value, Section):
             self._sections[key] = value
+            self._result_class = None
         elif not isinstance(value, dict):
             raise TypeError("only dict or Sector is allowed for sectors")
         else:
             self[key] = Section(value)
 
     def __delitem__(self, key):
+        if self.frozen:
+            raise TypeError("scheme is frozen")
+
         del self._sections[key]
+        self._result_class = None
 
     def __iter__(self):  # pragma: no cover
         return iter(self._sections)
@@ -78,31 +123,173 @@ class Zini(MutableMapping):
             repr(self._sections),
         )
 
-    def read(self, file_name):
+    @property
+    def tables(self):
+        return self._tables
+
+    @tables.setter
+    def tables(self, value):
+        if self.frozen:
+            raise TypeError("scheme is frozen")
+
+        self._tables = value
+
+    @property
+    def interpolation(self):
+        return self._interpolation
+
+    @interpolation.setter
+    def interpolation(self, value):
+        if self.frozen:
+            raise TypeError("scheme is frozen")
+
+        self._interpolation = value
+
+    def freeze(self):
+        """ Forbid changes of the scheme.
+
+        Frozen scheme is safe for parsing from many threads.
+        Parsers don't follow later changes of registries.
+        """
+        for section in self._sections.values():
+            section.freeze()
+
+        for table in self._tables.values():
+            table.section.freeze()
+
+        self._default_section.freeze()
+        self.result_class  # build class before sharing between threads
+        self._tables = MappingProxyType(self._tables)
+        self.frozen = True
+
+    @property
+    def result_class(self):
+        """ Class of typed result with attributes for sections.
+        """
+        if self._result_class is None:
+            self._result_class = Result.make_class('ZiniResult', self)
+
+        return self._result_class
+
+    def read(self, file_name, typed=False, projection=None, lazy=False,
+             source=None):
         """ Read a file for parsing.
         """
         with open(file_name) as f:
             content = f.read()
 
-        return self.parse(content)
+        return self.parse(content, typed=typed, projection=projection,
+                          lazy=lazy, source=source)
 
-    def parse(self, content):
+    def parse(self, content, typed=False, projection=None, lazy=False,
+              source=None):
         """ Parse data from string.
+
+        If `typed` is true, return `Result` objects instead of dicts.
+
+        `projection` limits result to the requested keys, values of other
+        keys are not converted or checked. See `make_projection`.
+
+        If `lazy` is true, sections are `LazySection` mappings: values are
+        checked while parsing, but converted on first access.
+
+        If `source` is set, it's filled with sections content for `diff`.
+
+        If `interpolation` attribute is true, `${section:key}` references
+        in strings are replaced by values, see `interpolate`.
         """
-        result = {}
+        if typed and lazy:
+            raise ValueError("typed results can't be lazy")
 
-        lost_section_keys = set(self.keys())
-        lines = enumerate(content.split('\n'))
+        result = self.result_class() if typed else {}
+        projection = make_projection(projection)
+
+        if projection is None:
+            lost_section_keys = set(self.keys())
+        else:
+            lost_section_keys = {k for k in projection if k in self}
+
+        lines = LineIndex(content)
+
+        if source is None:
+            headers = None
+        else:
+            source.index = lines
+            headers = source.headers
+
+        for table_key in self.tables:
+            if projection is None or table_key in projection:
+                result[table_key] = TableResult()
+
+        for section_key, section_token in tokenize_sections(lines, headers):
+            if source is not None:
+                source.add(section_key, section_token)
+
+            section = self._sections.get(section_key)
+
+            if section is None:
+                table_key = self.get_table_key(section_key)
+            else:
+                table_key = None
+
+            result_key = section_key if table_key is None else table_key
+
+            if projection is None:
+                keys = None
+            elif result_key in projection:
+                keys = projection[result_key]
+            else:
+                continue
+
+            if table_key is not None:
+                self.tables[table_key].append(
+                    result[table_key], section_key, section_token, keys)
+                continue
+            elif section is None:
+                section = self._default_section
 
-        for section_key, section_token in tokenize_sections(lines):
             lost_section_keys.discard(section_key)
-            result[section_key] = self[section_key](section_token)
+            result[section_key] = section(section_token, typed, keys, lazy)
 
         for section_key in lost_section_keys:
-            result[section_key] = self[section_key].get_defaults()
+            section = self._sections[section_key]
+            keys = None if projection is None else projection[section_key]
+            if typed:
+                result[section_key] = section.result_class(
+                    section.get_defaults(keys))
+            elif lazy:
+                result[section_key] = LazySection(section.get_defaults(keys))
+            else:
+                result[section_key] = section.get_defaults(keys)
+
+        if self.interpolation:
+            interpolate(result)
+
+            if source is not None:
+                source.interpolated = True
 
         return result
 
+    def add_table(self, key, pattern, section=None):
+        """ Parse sections with names matched `pattern` as one table.
+
+        Sections declared in the scheme are not matched.
+        """
+        if self.frozen:
+            raise TypeError("scheme is frozen")
+        elif not isinstance(key, str):
+            raise TypeError("only strings is allowed for tables name")
+
+        self._tables[key] = table = Table(pattern, section)
+        return table
+
+    def get_table_key(self, section_key):
+        for key, table in self.tables.items():
+            if table.match(section_key):
+                return key
+        else:
+            return None
+
     @property
     def defaults(self):
         """ Return default values.
@@ -112,6 +299,409 @@ class Zini(MutableMapping):
         return self.parse('')
 
 
+class Source:
+    """ Sections content of parsed file, is filled by `Zini.parse`.
+
+    Keeps a hash of every section for fast comparison, line of its header
+    and its range of lines for getting line numbers of keys.
+    """
+    def __init__(self):
+        self.index = None
+        self.hashes = {}
+        self.headers = {}
+        self.ranges = {}
+        self.interpolated = False
+
+    @property
+    def comparable(self):
+        """ Sections with the same hashes have the same values.
+
+        It's false for interpolated results: values depend on other
+        sections.
+        """
+        return not self.interpolated
+
+    def add(self, section_key, section_token):
+        content = '\n'.join(line for n, line in section_token)
+        self.hashes[section_key] = sha1(content.encode()).digest()
+        self.ranges[section_key] = (section_token[0][0], section_token[-1][0])
+
+    def get_section_line(self, section_key):
+        return self.headers.get(section_key)
+
+    def get_token(self, section_key):
+        """ Rebuild lines of section from the index.
+        """
+        first, last = self.ranges[section_key]
+        token = []
+
+        for n in range(first, last + 1):
+            line = self.index.line(n).rstrip()
+            if line[:1] not in ('#', ';'):
+                token.append((n, line))
+
+        return token
+
+    def get_key_lines(self, section_key):
+        """ Return dict of keys to line numbers.
+        """
+        if section_key not in self.ranges:
+            return {}
+
+        token = self.get_token(section_key)
+        return {get_key(t): t[0][0] for t in tokenize(token)}
+
+
+def diff(old, new, old_source=None, new_source=None):
+    """ Compare two results of `Zini.parse` of the same scheme.
+
+    Return list of `Change`. Sections with the same hashes in sources
+    are skipped without comparison of values.
+    """
+    changes = []
+
+    for section_key in old:
+        if section_key not in new:
+            line = old_source and old_source.get_section_line(section_key)
+            changes.append(Change('removed', section_key, None,
+                                  old[section_key], None, line))
+
+    for section_key in new:
+        if section_key not in old:
+            line = new_source and new_source.get_section_line(section_key)
+            changes.append(Change('added', section_key, None,
+                                  None, new[section_key], line))
+            continue
+
+        if (old_source is not None and new_source is not None and
+                old_source.comparable and new_source.comparable):
+            old_hash = old_source.hashes.get(section_key)
+            if (old_hash is not None and
+                    old_hash == new_source.hashes.get(section_key)):
+                continue
+
+        old_section = old[section_key]
+        new_section = new[section_key]
+
+        if not isinstance(new_section, Mapping):
+            if old_section != new_section:
+                changes.append(Change('changed', section_key, None,
+                                      old_section, new_section, None))
+            continue
+
+        old_lines = old_source.get_key_lines(section_key) if old_source else {}
+        new_lines = new_source.get_key_lines(section_key) if new_source else {}
+
+        for key in old_section:
+            if key not in new_section:
+                changes.append(Change('removed', section_key, key,
+                                      old_section[key], None,
+                                      old_lines.get(key)))
+
+        for key in new_section:
+            if key not in old_section:
+                changes.append(Change('added', section_key, key,
+                                      None, new_section[key],
+                                      new_lines.get(key)))
+            elif old_section[key] != new_section[key]:
+                changes.append(Change('changed', section_key, key,
+                                      old_section[key], new_section[key],
+                                      new_lines.get(key)))
+
+    return changes
+
+
+class Editor:
+    """ Change values in ini-file in place.
+
+    Offsets of all keys are indexed once. A new value is checked by the
+    key parser and written over the old one; if length is changed, only
+    the rest of the file after the value is rewritten. Comments and
+    formatting of other lines are kept.
+    """
+    def __init__(self, zini, file_name, result=None, encoding='utf-8'):
+        self.zini = zini
+        self.file_name = file_name
+        self.result = result
+        self.encoding = encoding
+        self._index = {}
+
+        with open(file_name, 'rb') as f:
+            content = f.read().decode(encoding)
+
+        lines = LineIndex(content)
+
+        starts = array('q', [0])
+        for n, line in lines:
+            starts.append(starts[-1] + len(line.encode(encoding)) + 1)
+
+        for section_key, section_token in tokenize_sections(lines):
+            for token in tokenize(section_token):
+                first, line = token[0]
+                last, last_line = token[-1]
+                start = starts[first]
+                end = starts[last] + len(last_line.encode(encoding))
+                self._index[(section_key, get_key(token))] = (
+                    start, end, first, last)
+
+    def get_offsets(self, section_key, key):
+        """ Return start and end offsets of the key in bytes.
+        """
+        start, end, first, last = self._index[(section_key, key)]
+        return start, end
+
+    def set(self, section_key, key, value):
+        """ Set source text of the value, e.g. `'"string"'` or `'13'`.
+
+        Lines of a block after the first one must be indented.
+        The value is changed in `result` too, if it has the section.
+        Return the converted value.
+        """
+        start, end, first, last = self._index[(section_key, key)]
+
+        with open(self.file_name, 'rb') as f:
+            f.seek(start)
+            line = f.read(end - start).split(b'\n', 1)[0]
+
+        line = line.decode(self.encoding)
+        head = line[:line.index('=') + 1]
+        value_lines = value.split('\n')
+        if value_lines[0]:
+            value_lines[0] = head + ' ' + value_lines[0]
+        else:
+            value_lines[0] = head
+
+        token = list(enumerate(value_lines, start=first))
+        tokens = list(tokenize(token))
+        if len(tokens) != 1 or len(tokens[0]) != len(token):
+            raise ParseError(first, value_lines[0], "value must be a block")
+
+        converted = self.get_parser(section_key, key)(tokens[0])
+
+        target = self.get_target(section_key, key)
+        if target is not None and isinstance(target[0], array):
+            try:
+                array(target[0].typecode, [converted])
+            except (TypeError, OverflowError) as exc:
+                raise ParseError(first, value_lines[0], str(exc)) from exc
+
+        data = '\n'.join(value_lines).encode(self.encoding)
+        self._write(start, end, data)
+        self._reindex(start, end, start + len(data),
+                      first, last, first + len(token) - 1)
+
+        if target is not None:
+            container, index = target
+            container[index] = converted
+
+        return converted
+
+    def get_parser(self, section_key, key):
+        zini = self.zini
+        section = zini._sections.get(section_key)
+
+        if section is None:
+            table_key = zini.get_table_key(section_key)
+            if table_key is None:
+                section = zini._default_section
+            else:
+                section = zini.tables[table_key].section
+
+        if key in section:
+            return section[key]
+        else:
+            return section.get_default_parser()
+
+    def get_target(self, section_key, key):
+        """ Return container and index of the value in `result`.
+
+        For sections of tables it's a column and a row. Return `None`
+        if `result` is not set or doesn't have the section.
+        """
+        result = self.result
+        if result is None:
+            return None
+
+        if section_key in self.zini:
+            table_key = None
+        else:
+            table_key = self.zini.get_table_key(section_key)
+
+        if table_key is None:
+            if section_key not in result:
+                return None
+
+            return result[section_key], key
+
+        table = result.get(table_key)
+        if (table is None or key not in table.columns or
+                section_key not in table.index):
+            return None
+
+        return table.columns[key], table.index.index(section_key)
+
+    def _write(self, start, end, data):
+        with open(self.file_name, 'r+b') as f:
+            if len(data) == end - start:
+                f.seek(start)
+                f.write(data)
+            else:
+                f.seek(end)
+                tail = f.read()
+                f.seek(start)
+                f.write(data)
+                f.write(tail)
+                f.truncate()
+
+    def _reindex(self, start, end, new_end, first, last, new_last):
+        shift = new_end - end
+        lines_shift = new_last - last
+
+        for index_key, (s, e, f, l) in self._index.items():
+            if s == start:
+                self._index[index_key] = (start, new_end, first, new_last)
+            elif s > start and (shift or lines_shift):
+                self._index[index_key] = (s + shift, e + shift,
+                                          f + lines_shift, l + lines_shift)
+
+
+class SnapshotHolder:
+    """ Holder of the last parse result for sharing between threads.
+
+    Readers get the current `Snapshot` without locking. Writers parse
+    a new content aside and atomically replace the snapshot.
+    The scheme is frozen on holder creation.
+
+    Last `history` snapshots are kept for `rollback`, within
+    `history_bytes` if it's set. Sections which are not changed
+    are shared between snapshots.
+    """
+    def __init__(self, zini, typed=False, history=1, history_bytes=None):
+        if history < 1:
+            raise ValueError("history must be positive")
+
+        zini.freeze()
+        self.zini = zini
+        self.typed = typed
+        self.history_bytes = history_bytes
+        self._lock = threading.Lock()
+        self._history = deque(maxlen=history)
+        self._versions = {}
+        self._sections = {}
+        self._history_size = 0
+        self._snapshot = None
+        self._push(zini.parse('', typed=typed), {})
+
+    @property
+    def snapshot(self):
+        return self._snapshot
+
+    @property
+    def result(self):
+        return self._snapshot.result
+
+    @property
+    def versions(self):
+        """ Versions of snapshots in history, from old to new.
+        """
+        return [entry.snapshot.version for entry in list(self._history)]
+
+    @property
+    def history_size(self):
+        """ Approximate size in bytes of results in history.
+        """
+        return self._history_size
+
+    def read(self, file_name):
+        """ Read a file and replace the snapshot.
+        """
+        with open(file_name) as f:
+            content = f.read()
+
+        return self.parse(content)
+
+    def parse(self, content):
+        """ Parse data from string and replace the snapshot.
+        """
+        source = Source()
+        result = self.zini.parse(content, typed=self.typed, source=source)
+
+        with self._lock:
+            last = self._history[-1]
+            hashes = source.hashes if source.comparable else {}
+
+            for section_key, section_hash in hashes.items():
+                if (last.hashes.get(section_key) == section_hash and
+                        section_key in result):
+                    result[section_key] = last.snapshot.result[section_key]
+
+            return self._push(result, hashes)
+
+    def rollback(self, version=None):
+        """ Make a snapshot from history current again.
+
+        By default it's the snapshot before the parsed one, which
+        the current snapshot comes from, so repeated calls keep
+        walking back. Raise `IndexError` if there is no such snapshot.
+        Return the new `Snapshot` with the next version.
+        """
+        with self._lock:
+            if version is None:
+                origin = self._history[-1].origin
+                versions = [e.snapshot.version for e in self._history]
+                index = versions.index(origin) if origin in versions else 0
+
+                if index < 1:
+                    raise IndexError("no snapshot before version {} "
+                                     "in history".format(origin))
+
+                entry = self._history[index - 1]
+            else:
+                entry = self._versions[version]
+
+            return self._push(entry.snapshot.result, entry.hashes,
+                              entry.origin)
+
+    def _push(self, result, hashes, origin=None):
+        version = 0 if self._snapshot is None else self._snapshot.version + 1
+        snapshot = Snapshot(version, result)
+        entry = HistoryEntry(snapshot, hashes,
+                             version if origin is None else origin)
+
+        if len(self._history) == self._history.maxlen:
+            self._forget(self._history[0])
+
+        self._history.append(entry)
+        self._versions[version] = entry
+
+        for section in result.values():
+            ref = self._sections.get(id(section))
+            if ref is None:
+                size = get_size(section)
+                self._sections[id(section)] = [section, size, 1]
+                self._history_size += size
+            else:
+                ref[2] += 1
+
+        while (self.history_bytes is not None and
+                self._history_size > self.history_bytes and
+                len(self._history) > 1):
+            self._forget(self._history.popleft())
+
+        self._snapshot = snapshot
+        return snapshot
+
+    def _forget(self, entry):
+        del self._versions[entry.snapshot.version]
+
+        for section in entry.snapshot.result.values():
+            ref = self._sections[id(section)]
+            ref[2] -= 1
+            if not ref[2]:
+                del self._sections[id(section)]
+                self._history_size -= ref[1]
+
+
 class Parser:
     default = NOT_SET
 
@@ -128,29 +718,69 @@ class Parser:
         self.check(token)
         return get_keyvalue(token).value
 
+    def parse_token(self, token):
+        """ Convert token, which is already checked.
+        """
+        return self(token)
+
+    def freeze(self):
+        """ Stop following changes of registries, see `Zini.freeze`.
+        """
+
     def check(self, token):  # pragma: no cover
         if not token:
             raise ParseError(*token[0])
 
 
 class OneLineParser(Parser):
+    cache_values = False
+
     def __call__(self, token):
-        value = super().__call__(token)
+        value, checked = self.check_token(token)
         try:
-            return self.parse_value(value)
+            return self.convert(value)
+        except ValueError as exc:  # pragma: no cover
+            raise ParseError(*token[0]) from exc
+
+    def parse_token(self, token):
+        try:
+            return self.convert(get_keyvalue(token).value)
         except ValueError as exc:  # pragma: no cover
             raise ParseError(*token[0]) from exc
 
+    def convert(self, value):
+        """ Parse value with memoization of short literals.
+
+        Results are shared between all instances of the parser class.
+        """
+        if not self.cache_values or len(value) > VALUES_CACHE_MAX_LENGTH:
+            return self.parse_value(value)
+
+        key = (self.__class__, value)
+        try:
+            return _values_cache[key]
+        except KeyError:
+            result = self.parse_value(value)
+            if len(_values_cache) < VALUES_CACHE_SIZE:
+                _values_cache[key] = result
+            return result
+
     def parse_value(self, value):  # pragma: no cover
         raise NotImplementedError()
 
     def check(self, token):
+        return self.check_token(token)[1]
+
+    def check_token(self, token):
+        """ Check token, return its value and result of `check_value`.
+        """
         super().check(token)
         if len(token) > 1:
             raise ParseError(*token[1])
 
+        value = get_keyvalue(token).value
         try:
-            self.check_value(get_keyvalue(token).value)
+            return value, self.check_value(value)
         except ValueError as exc:
             n, line = token[0]
             raise ParseError(n, line, str(exc)) from exc
@@ -160,6 +790,8 @@ class OneLineParser(Parser):
 
 
 class NoneParser(OneLineParser):
+    cache_values = True
+
     def __init__(self):
         super().__init__()
 
@@ -183,16 +815,17 @@ class StringParser(OneLineParser):
 
 
 class BooleanParser(OneLineParser):
+    cache_values = True
+    values = {'false': False, 'true': True}
+
     def parse_value(self, value):
-        if value == 'false':
-            return False
-        elif value == 'true':
-            return True
-        else:   # pragma: no cover
-            raise ValueError()
+        try:
+            return self.values[value]
+        except KeyError:   # pragma: no cover
+            raise ValueError() from None
 
     def check_value(self, value):
-        if value not in ['false', 'true']:
+        if value not in self.values:
             raise ValueError()
 
 
@@ -215,172 +848,515 @@ class FloatParser(BaseSimpleParser):
 
 
 class DatetimeParser(OneLineParser):
+    def __call__(self, token):
+        # groups of the value are matched once for check and conversion
+        value, groups = self.check_token(token)
+        try:
+            return make_datetime(groups)
+        except ValueError as exc:  # pragma: no cover
+            raise ParseError(*token[0]) from exc
+
     def parse_value(self, value):
-        return dateutil.parser.parse(value)
+        return parse_datetime(value)
+
+    def parse_values(self, values, as_array=False):
+        """ Bulk conversion for lists.
+
+        With `as_array` return microseconds since epoch.
+        """
+        return parse_datetimes(values, epoch=as_array)
 
     def check_value(self, value):
-        if not RE_ISO8601.match(value):
+        match = RE_DATETIME.match(value)
+        if match is None or match.end() != len(value):
             raise ValueError()
 
+        groups = match.groups()
+        check_datetime(groups)
+        return groups
+
 
 class TimedeltaParser(OneLineParser):
+    cache_values = True
+
     def parse_value(self, value):
-        res = RE_TIMEDELTA.match(value)
-        tdelta = {k: int(v) for k, v in res.groupdict().items() if v}
-        return timedelta(**tdelta)
+        return parse_timedelta(value)
 
     def check_value(self, value):
-        res = RE_TIMEDELTA.match(value)
-        if not (res and [i for i in res.groups() if i]):
-            raise ValueError()
+        self.convert(value)
+
+
+class RegistryMixin:
+    """ Parser, which makes parsers of nested values by a registry.
+
+    The global `registry` is used, if `registry` attribute isn't set.
+    """
+    registry = None
+
+    def get_registry(self):
+        return registry if self.registry is None else self.registry
 
 
-class ListParser(Parser):
-    def __init__(self, item_parser=None, default=NOT_SET):
+class GenericMixin(RegistryMixin):
+    """ Parser of values with unknown type, which tries generic parsers.
+
+    If `parsers` is set to a list of parser classes, they are tried
+    instead of generic parsers of the registry.
+    """
+    parsers = None
+    one_line = False
+    _parsers = None
+
+    def __init__(self, default=NOT_SET, registry=None):
+        super().__init__(default)
+        self.registry = registry
+
+    def get_parsers(self):
+        if self._parsers is not None:
+            return self._parsers
+        elif self.parsers is None:
+            return self.get_registry().get_generic_parsers(self.one_line)
+
+        self._parsers = self.get_registry().get_generic_parsers(
+            classes=self.parsers)
+        return self._parsers
+
+    def freeze(self):
+        if self._parsers is None:
+            parsers = self.get_registry()
+            classes = self.parsers
+            if classes is None:
+                classes = parsers.get_generic_classes(self.one_line)
+
+            self._parsers = parsers.get_generic_parsers(classes=classes)
+
+        for parser in self._parsers:
+            parser.freeze()
+
+
+class ListParser(RegistryMixin, Parser):
+    item_marker = '-'
+    array_typecodes = {
+        IntegerParser: 'q',
+        FloatParser: 'd',
+        DatetimeParser: 'q',
+    }
+
+    def __init__(self, item_parser=None, default=NOT_SET, as_array=False,
+                 registry=None):
+        self.registry = registry
+
         if item_parser is not None:
             self.item_parser = item_parser
 
-        elif (default is not NOT_SET and
-                len(default) == 1 and
-                default[0] in [str, int, datetime]):
+        elif default is not NOT_SET and len(default) == 1:
+            self.item_parser = self.get_item_parser(default[0], as_array)
+
+        else:
+            self.item_parser = self.get_registry().make_parser(
+                GenericListItemParser)
 
-            value = default[0]
-            if value is str:
-                self.item_parser = StringParser()
-            elif value is int:
-                self.item_parser = IntegerParser()
-            elif value is datetime:
-                self.item_parser = DatetimeParser()
-            else:  # pragma: no cover
-                raise NotImplementedError(default)
+        if not isinstance(self.item_parser, (OneLineParser, ListParser)):
+            raise TypeError("only one-line or list parsers is allowed "
+                            "for items, got {!r}".format(self.item_parser))
 
+        if not as_array or isinstance(self.item_parser, ListParser):
+            self.typecode = None
+        elif type(self.item_parser) in self.array_typecodes:
+            self.typecode = self.array_typecodes[type(self.item_parser)]
         else:
-            self.item_parser = GenericListItemParser()
+            raise TypeError("arrays is allowed only for int or float items")
 
         default = NOT_SET
 
         self.default = default
 
     def __call__(self, token):
-        self.check(token)
-
-        res = []
-        for n, line in token[1:]:
-            value = self.item_parser.parse_value(line.strip())
-            res.append(value)
+        self.check_head(token)
+        res, pos = self.parse_block(token, 1)
+        return res
 
+    def parse_token(self, token):
+        res, pos = self.parse_block(token, 1)
         return res
 
     def check(self, token):
+        self.check_head(token)
+        self.parse_block(token, 1, convert=False)
+
+    def check_head(self, token):
         super().check(token)
         key, value = get_keyvalue(token)
         if value:
             raise ParseError(*token[0])
 
-        for n, line in token[1:]:
-            try:
-                self.item_parser.check_value(line.strip())
-            except ValueError as exc:
-                raise ParseError(n, line, str(exc)) from exc
+    def freeze(self):
+        self.item_parser.freeze()
 
+    def get_item_parser(self, value, as_array=False):
+        parsers = self.get_registry()
 
-class GenericListItemParser(OneLineParser):
-    parsers = [
-        NoneParser,
-        StringParser,
-        BooleanParser,
-        IntegerParser,
-        FloatParser,
-        DatetimeParser,
-        TimedeltaParser,
-    ]
+        if isinstance(value, list):
+            return parsers.make_parser(ListParser, default=value,
+                                       as_array=as_array)
+        elif isinstance(value, type):
+            parser_class = parsers.lookup(value)
+            if parser_class is not None:
+                return parsers.make_parser(parser_class)
 
-    def parse_value(self, value):
-        for parser in self.parsers:
-            try:
-                parser().check_value(value)
-                return parser().parse_value(value)
-            except ValueError:
-                pass
-        else:  # pragma: no cover
-            raise RuntimeError()
+        return parsers.make_parser(GenericListItemParser)
 
-    def check_value(self, value):
-        for parser in self.parsers:
-            try:
-                parser().check_value(value)
-                return
-            except ValueError:
-                pass
+    @property
+    def nested_parser(self):
+        """ Parser for the nested lists, started by `item_marker`.
+        """
+        if isinstance(self.item_parser, ListParser):
+            return self.item_parser
+        elif isinstance(self.item_parser, GenericListItemParser):
+            return self
         else:
-            raise ValueError()
+            return None
 
+    def parse_block(self, token, pos, convert=True):
+        """ Parse items of block started from `token[pos]`.
 
-class GenericParser(Parser):
-    parsers = [
-        NoneParser,
-        StringParser,
-        BooleanParser,
-        IntegerParser,
-        FloatParser,
-        DatetimeParser,
-        TimedeltaParser,
-        ListParser,
-    ]
+        Nested lists are parsed in the same pass over the lines.
+        Item parsers with `parse_values` method convert all items
+        of the block at once.
+        Return list of values and position of the first line
+        after the block.
+        """
+        res = []
+        item_indent = None
+        nested_parser = self.nested_parser
+        bulk = convert and hasattr(self.item_parser, 'parse_values')
+        bulk_lines = []
 
-    def __call__(self, token):
-        self.check(token)
-        for parser in self.parsers:
-            try:
-                return parser()(token)
-            except ParseError:
-                pass
-        else:
-            raise ParseError(*token[0])
+        while pos < len(token):
+            n, line = token[pos]
+            value = line.strip()
 
-    def check(self, token):
-        for parser in self.parsers:
-            try:
-                parser().check(token)
-                return
-            except ParseError:
-                pass
+            if not value:
+                indent = item_indent
+            else:
+                indent = get_indent(line)
+
+            if item_indent is None:
+                item_indent = indent
+            elif indent < item_indent:
+                break
+            elif indent > item_indent:
+                raise ParseError(n, line)
+
+            pos += 1
+
+            if value == self.item_marker and nested_parser is not None:
+                if (pos == len(token) or
+                        get_indent(token[pos][1]) <= item_indent):
+                    raise ParseError(n, line, "nested list is empty")
+
+                item, pos = nested_parser.parse_block(token, pos, convert)
+
+            elif nested_parser is self.item_parser:
+                raise ParseError(n, line, "nested list expected")
+
+            elif bulk:
+                bulk_lines.append((n, line))
+                item = value
+
+            else:
+                try:
+                    self.item_parser.check_value(value)
+                    if convert:
+                        item = self.item_parser.convert(value)
+                    elif self.typecode is not None:
+                        self.check_array_item(value)
+                except (ValueError, OverflowError) as exc:
+                    raise ParseError(n, line, str(exc)) from exc
+
+            if convert:
+                res.append(item)
+
+        if bulk:
+            res = self.parse_bulk(res, bulk_lines)
+
+        if convert and self.typecode is not None:
+            try:
+                res = array(self.typecode, res)
+            except OverflowError as exc:
+                n, line = token[pos - 1]
+                raise ParseError(n, line, str(exc)) from exc
+
+        return res, pos
+
+    def check_array_item(self, value):
+        """ Check that the value fits into array of `typecode`.
+        """
+        array(self.typecode, [self.item_parser.convert(value)])
+
+    def parse_bulk(self, values, lines):
+        try:
+            return self.item_parser.parse_values(
+                values, as_array=self.typecode is not None)
+        except ValueError:
+            for (n, line), value in zip(lines, values):
+                try:
+                    self.item_parser.check_value(value)
+                    self.item_parser.parse_value(value)
+                except ValueError as exc:
+                    raise ParseError(n, line, str(exc)) from exc
+
+            raise  # pragma: no cover
+
+
+class Text(str):
+    """ Type of multi-line text values for schemes.
+    """
+
+
+class TextParser(Parser):
+    """ Multi-line text: `key = |` with an indented block.
+
+    The block is dedented by indent of its first line, trailing
+    whitespace is kept. It's sliced from the source text at once,
+    if the token has `LineIndex`.
+    """
+    marker = '|'
+
+    def __call__(self, token):
+        self.check(token)
+        return self.parse_token(token)
+
+    def parse_token(self, token):
+        if len(token) == 1:
+            return ''
+
+        first, line = token[1]
+        last = token[-1][0]
+        indent = get_indent(line)
+        line_index = getattr(token, 'line_index', None)
+
+        if line_index is None:
+            text = '\n'.join([line for n, line in token[1:]])
+        elif last - first == len(token) - 2:
+            starts = line_index.starts
+            text = line_index.content[starts[first]:starts[last + 1] - 1]
+        else:
+            # lines of comments are skipped, the block isn't contiguous
+            text = '\n'.join([line_index.line(n) for n, line in token[1:]])
+
+        prefix = '\n' + ' ' * indent
+        if text.count('\n') == text.count(prefix):
+            return text[indent:].replace(prefix, '\n')
+
+        # whitespace-only lines may be shorter than indent
+        return re.sub('(?m)^ {{0,{}}}'.format(indent), '', text)
+
+    def check(self, token):
+        super().check(token)
+        key, value = get_keyvalue(token)
+        if value != self.marker:
+            raise ParseError(*token[0])
+
+
+class GenericListItemParser(GenericMixin, OneLineParser):
+    one_line = True
+
+    def parse_value(self, value):
+        for parser in self.get_parsers():
+            try:
+                parser.check_value(value)
+                return parser.convert(value)
+            except ValueError:
+                pass
+        else:  # pragma: no cover
+            raise RuntimeError()
+
+    def check_value(self, value):
+        for parser in self.get_parsers():
+            try:
+                parser.check_value(value)
+                return
+            except ValueError:
+                pass
+        else:
+            raise ValueError()
+
+
+class GenericParser(GenericMixin, Parser):
+    def __call__(self, token):
+        return self.parse_token(token)
+
+    def parse_token(self, token):
+        for parser in self.get_parsers():
+            try:
+                return parser(token)
+            except ParseError:
+                pass
         else:
             raise ParseError(*token[0])
 
+    def check(self, token):
+        for parser in self.get_parsers():
+            try:
+                parser.check(token)
+                return
+            except ParseError:
+                pass
+        else:
+            raise ParseError(*token[0])
+
+
+class ParserRegistry:
+    """ Registry of parsers for types of values.
+
+    Lookup walks MRO of the type and is cached, so it's a dict lookup
+    for known types. Parsers of values with unknown type are tried
+    in order of registration, after `NoneParser`.
+    """
+    def __init__(self, items=()):
+        self._parsers = OrderedDict()
+        self._cache = {}
+        self._generic = {}
+
+        for value_type, parser_class in items:
+            self.register(value_type, parser_class)
+
+    def __iter__(self):
+        return iter(list(self._parsers.items()))
+
+    def __len__(self):
+        return len(self._parsers)
+
+    def __repr__(self):
+        return "{}({!r})".format(
+            self.__class__.__name__,
+            list(self),
+        )
+
+    def register(self, value_type, parser_class):
+        if not isinstance(value_type, type):
+            raise TypeError("only types is allowed for registration")
+        elif not (isinstance(parser_class, type) and
+                  issubclass(parser_class, Parser)):
+            raise TypeError("only Parser subclasses is allowed for parsers")
+
+        self._parsers[value_type] = parser_class
+        self._cache = {}
+        self._generic = {}
+
+    def lookup(self, value_type):
+        """ Return parser class for type or `None`.
+        """
+        cache = self._cache
+
+        try:
+            return cache[value_type]
+        except KeyError:
+            pass
+
+        for cls in value_type.__mro__:
+            parser_class = self._parsers.get(cls)
+            if parser_class is not None:
+                break
+        else:
+            parser_class = None
+
+        cache[value_type] = parser_class
+        return parser_class
+
+    def make_parser(self, parser_class, *args, **kwargs):
+        """ Make parser, which uses this registry for nested values.
+        """
+        if issubclass(parser_class, RegistryMixin):
+            kwargs['registry'] = self
+
+        return parser_class(*args, **kwargs)
+
+    def get_generic_classes(self, one_line=False):
+        """ Classes of parsers for values with unknown type.
+        """
+        classes = [NoneParser]
+        for parser_class in self._parsers.values():
+            if parser_class in classes:
+                continue
+            elif one_line and not issubclass(parser_class, OneLineParser):
+                continue
+            classes.append(parser_class)
+
+        return classes
+
+    def get_generic_parsers(self, one_line=False, classes=None):
+        """ Instances of parsers for values with unknown type.
+
+        If `classes` is set, they are used instead of registered ones.
+        """
+        if classes is not None:
+            return tuple(self.make_parser(cls) for cls in classes)
+
+        generic = self._generic
+
+        try:
+            return generic[one_line]
+        except KeyError:
+            pass
+
+        classes = self.get_generic_classes(one_line)
+        generic[one_line] = parsers = tuple(
+            self.make_parser(cls) for cls in classes)
+        return parsers
+
+
+registry = ParserRegistry([
+    (str, StringParser),
+    (bool, BooleanParser),
+    (int, IntegerParser),
+    (float, FloatParser),
+    (datetime, DatetimeParser),
+    (timedelta, TimedeltaParser),
+    (list, ListParser),
+    (Text, TextParser),
+])
+
 
 class Section(MutableMapping):
     default_parser_class = GenericParser
-
-    parsers = [
-        (str, StringParser),
-        (bool, BooleanParser),
-        (int, IntegerParser),
-        (float, FloatParser),
-        (datetime, DatetimeParser),
-        (timedelta, TimedeltaParser),
-        (list, ListParser),
-    ]
+    # `ParserRegistry` or list of `(type, parser class)` pairs
+    parsers = registry
 
     def __init__(self, data=None):
         self._data = {}
+        self._result_class = None
+        self._default_parser = None
+        self.frozen = False
+
+        if not isinstance(self.parsers, ParserRegistry):
+            self.parsers = ParserRegistry(self.parsers)
+
         if data:
-            for k, v in data.items():
-                self[k] = v
+            self.update(data)
 
     def __getitem__(self, key):
         return self._data[key]
 
     def __setitem__(self, key, value):
-        if not isinstance(key, str):
+        if self.frozen:
+            raise TypeError("scheme is frozen")
+        elif not isinstance(key, str):
             raise TypeError("only strings is allowed for keys")
         elif isinstance(value, Parser):
             self._data[key] = value
         else:
             self._data[key] = self.get_parser(value)
 
+        self._result_class = None
+
     def __delitem__(self, key):
+        if self.frozen:
+            raise TypeError("scheme is frozen")
+
         del self._data[key]
+        self._result_class = None
 
     def __iter__(self):  # pragma: no cover
         return iter(self._data)
@@ -394,150 +1370,760 @@ class Section(MutableMapping):
             repr(self._data),
         )
 
-    def __call__(self, lines):
-        result = self.get_defaults()
+    def __call__(self, lines, typed=False, keys=None, lazy=False):
+        """ Parse lines of section.
+
+        If `keys` is set, only these keys are converted.
+        If `lazy` is true, values are checked, but converted on first access.
+        """
+        if typed:
+            result = self.result_class(self.get_defaults(keys))
+        elif lazy:
+            result = LazySection(self.get_defaults(keys))
+        else:
+            result = self.get_defaults(keys)
 
         for token in tokenize(lines):
             key = get_key(token)
 
-            if key in self:
+            if keys is not None and key not in keys:
+                continue
+            elif key in self:
                 parser = self[key]
             else:
-                parser = self.default_parser_class()
+                parser = self.get_default_parser()
 
-            result[key] = parser(token)
+            if lazy:
+                parser.check(token)
+                result[key] = LazyValue(parser, token)
+            else:
+                result[key] = parser(token)
 
         return result
 
+    def freeze(self):
+        """ Forbid changes of the scheme.
+
+        Parsers are frozen with generic parsers of the registry
+        at this moment.
+        """
+        for parser in self._data.values():
+            parser.freeze()
+
+        self._default_parser = self.get_default_parser()
+        self._default_parser.freeze()
+        self.result_class  # build class before sharing between threads
+        self.frozen = True
+
+    @property
+    def result_class(self):
+        """ Class of typed result with `__slots__` for declared keys.
+        """
+        if self._result_class is None:
+            self._result_class = Result.make_class('SectionResult', self)
+
+        return self._result_class
+
+    def update(self, data=(), **kwargs):
+        """ Set parsers for many keys at once.
+        """
+        if self.frozen:
+            raise TypeError("scheme is frozen")
+
+        if isinstance(data, Mapping):
+            data = data.items()
+
+        parsers = {}
+        for items in (data, kwargs.items()):
+            for key, value in items:
+                if not isinstance(key, str):
+                    raise TypeError("only strings is allowed for keys")
+                elif isinstance(value, Parser):
+                    parsers[key] = value
+                else:
+                    parsers[key] = self.get_parser(value)
+
+        self._data.update(parsers)
+        self._result_class = None
+
     def get_parser(self, value):
+        parsers = self.parsers
+
         if isinstance(value, type):
-            check = issubclass
+            parser_class = parsers.lookup(value)
+            if parser_class is not None:
+                return parsers.make_parser(parser_class)
         else:
-            check = isinstance
+            parser_class = parsers.lookup(type(value))
+            if parser_class is not None:
+                return parsers.make_parser(parser_class, default=value)
 
-        for t, parser in self.parsers:
-            if check(value, t):
-                if isinstance(value, type):
-                    return parser()
-                else:
-                    return parser(default=value)
-        else:
-            return self.default_parser_class(value)
+        return parsers.make_parser(self.default_parser_class, value)
 
-    def get_defaults(self):
+    def get_default_parser(self):
+        """ Parser for keys, which are not in the scheme.
+        """
+        if self._default_parser is not None:
+            return self._default_parser
+
+        return self.parsers.make_parser(self.default_parser_class)
+
+    def get_defaults(self, keys=None):
         defaults = {}
 
         for key, parser in self.items():
-            if parser.default is not NOT_SET:
+            if keys is not None and key not in keys:
+                continue
+            elif parser.default is not NOT_SET:
                 defaults[key] = parser.default
 
         return defaults
 
 
-def tokenize_sections(lines):
-    lines = ((n, l.rstrip()) for n, l in lines)
+class Table:
+    """ Scheme for many sections with the same keys.
 
-    for n, line in lines:
+    Values are collected to columns: `array.array` for int and float
+    keys and lists for others.
+    """
+    array_typecodes = {
+        IntegerParser: 'q',
+        FloatParser: 'd',
+    }
+
+    def __init__(self, pattern, section=None):
+        if isinstance(section, Section):
+            self.section = section
+        else:
+            self.section = Section(section)
+
+        self.pattern = pattern
+        self._re = re.compile('(?:{})\\Z'.format(pattern))
+
+    def __repr__(self):
+        return "{}({!r}, {!r})".format(
+            self.__class__.__name__,
+            self.pattern,
+            self.section,
+        )
+
+    def match(self, section_key):
+        return self._re.match(section_key) is not None
+
+    def make_column(self, key, rows):
+        typecode = self.array_typecodes.get(type(self.section.get(key)))
+        if typecode is None:
+            return [None] * rows
+        else:
+            return array(typecode)
+
+    def append(self, result, section_key, lines, keys=None):
+        """ Parse lines of section as a row of table.
+        """
+        row = len(result.index)
+        columns = result.columns
+        first_line = lines[0]
+
+        for token in tokenize(lines):
+            key = get_key(token)
+
+            if keys is not None and key not in keys:
+                continue
+            elif key in self.section:
+                parser = self.section[key]
+            else:
+                parser = self.section.get_default_parser()
+
+            value = parser(token)
+            column = columns.get(key)
+
+            if column is None:
+                column = columns[key] = self.make_column(key, row)
+
+            try:
+                if len(column) > row:
+                    column[row] = value
+                elif len(column) == row:
+                    column.append(value)
+                else:
+                    raise ValueError("value of {!r} is required".format(key))
+            except (TypeError, ValueError, OverflowError) as exc:
+                n, line = token[0]
+                raise ParseError(n, line, str(exc)) from exc
+
+        for key, parser in self.section.items():
+            if key not in columns and (keys is None or key in keys):
+                columns[key] = self.make_column(key, row)
+
+        for key, column in columns.items():
+            if len(column) == row:
+                parser = self.section.get(key)
+                default = getattr(parser, 'default', None)
+                if default is NOT_SET:
+                    default = None
+
+                try:
+                    column.append(default)
+                except TypeError as exc:
+                    n, line = first_line
+                    raise ParseError(n, line, "value of {!r} is required "
+                                              "in section {!r}".format(
+                                                  key, section_key)) from exc
+
+        result.index.append(section_key)
+
+
+class TableResult:
+    """ Result of table parsing: names of sections and columns of values.
+    """
+    def __init__(self):
+        self.index = []
+        self.columns = {}
+
+    def __repr__(self):
+        return "{}({} rows, columns={!r})".format(
+            self.__class__.__name__,
+            len(self),
+            sorted(self.columns),
+        )
+
+    def __len__(self):
+        return len(self.index)
+
+    def __getitem__(self, key):
+        return self.columns[key]
+
+    def __eq__(self, other):
+        if not isinstance(other, TableResult):
+            return NotImplemented
+
+        return self.index == other.index and self.columns == other.columns
+
+    def row(self, section_key):
+        """ Return values of section as dict.
+        """
+        i = self.index.index(section_key)
+        return {k: c[i] for k, c in self.columns.items()}
+
+
+class LazyValue:
+    """ Checked token, which will be converted by parser on demand.
+    """
+    __slots__ = ('parser', 'token')
+
+    def __init__(self, parser, token):
+        self.parser = parser
+        self.token = token
+
+    def __repr__(self):
+        return "{}({!r}, lines={})".format(
+            self.__class__.__name__,
+            self.parser,
+            self.lines,
+        )
+
+    @property
+    def lines(self):
+        """ Numbers of the first and the last lines of the token.
+        """
+        return self.token[0][0], self.token[-1][0]
+
+    @property
+    def raw(self):
+        """ Source text of the token.
+        """
+        return '\n'.join(line for n, line in self.token)
+
+    def resolve(self):
+        return self.parser.parse_token(self.token)
+
+
+class LazySection(MutableMapping):
+    """ Section result, which converts `LazyValue` on first access.
+    """
+    def __init__(self, data=None):
+        self._data = dict(data) if data else {}
+
+    def __getitem__(self, key):
+        value = self._data[key]
+        if isinstance(value, LazyValue):
+            value = self._data[key] = value.resolve()
+
+        return value
+
+    def __setitem__(self, key, value):
+        self._data[key] = value
+
+    def __delitem__(self, key):
+        del self._data[key]
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __repr__(self):
+        return "{}({})".format(
+            self.__class__.__name__,
+            repr(self._data),
+        )
+
+    def get_raw(self, key):
+        """ Return value without conversion: `LazyValue` or converted value.
+        """
+        return self._data[key]
+
+
+class Result(MutableMapping):
+    """ Base class for typed parse results.
+
+    Subclasses are made by `make_class` with `__slots__` for declared keys,
+    so values are accessible as attributes. Undeclared keys, and keys
+    which can't be an attribute name, are stored in a dict.
+    """
+    __slots__ = ('_extra',)
+    _fields = ()
+    _fields_set = frozenset()
+
+    def __init__(self, data=None):
+        self._extra = None
+        if data:
+            self.update(data)
+
+    @classmethod
+    def make_class(cls, name, keys):
+        reserved = set(dir(cls))
+        fields = tuple(k for k in keys
+                       if k.isidentifier() and
+                       not k.startswith('_') and
+                       k not in reserved)
+
+        return type(name, (cls,), {
+            '__module__': __name__,
+            '__slots__': fields,
+            '_fields': fields,
+            '_fields_set': frozenset(fields),
+        })
+
+    def __reduce__(self):
+        # made classes aren't importable, they are rebuilt by fields
+        return _restore_result, (self.__class__.__name__, self._fields,
+                                 dict(self))
+
+    def __getattr__(self, name):
+        if name != '_extra' and self._extra and name in self._extra:
+            return self._extra[name]
+
+        raise AttributeError(name)
+
+    def __getitem__(self, key):
+        if key in self._fields_set:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        elif self._extra is None:
+            raise KeyError(key)
+        else:
+            return self._extra[key]
+
+    def __setitem__(self, key, value):
+        if key in self._fields_set:
+            setattr(self, key, value)
+        elif self._extra is None:
+            self._extra = {key: value}
+        else:
+            self._extra[key] = value
+
+    def __delitem__(self, key):
+        if key in self._fields_set:
+            try:
+                delattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        elif self._extra is None:
+            raise KeyError(key)
+        else:
+            del self._extra[key]
+
+    def __iter__(self):
+        for key in self._fields:
+            if hasattr(self, key):
+                yield key
+
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return "{}({})".format(
+            self.__class__.__name__,
+            repr(dict(self)),
+        )
+
+    def as_dict(self):
+        """ Return values as plain dicts.
+        """
+        return {k: v.as_dict() if isinstance(v, Result) else v
+                for k, v in self.items()}
+
+
+def _restore_result(name, fields, data):
+    key = (name, fields)
+    cls = _result_classes.get(key)
+    if cls is None:
+        cls = _result_classes.setdefault(key, Result.make_class(name, fields))
+
+    return cls(data)
+
+
+class LineIndex:
+    """ Text with an array of offsets of lines.
+
+    Iteration yields `(n, line)` like `enumerate(content.split('\\n'))`,
+    but lines are sliced on demand and not kept all at once.
+    """
+    def __init__(self, content):
+        self.content = content
+        self.starts = starts = array('q', [0])
+
+        find = content.find
+        pos = find('\n')
+        while pos != -1:
+            starts.append(pos + 1)
+            pos = find('\n', pos + 1)
+
+        starts.append(len(content) + 1)
 
-        if not line:
+    def __len__(self):
+        return len(self.starts) - 1
+
+    def __iter__(self):
+        content = self.content
+        starts = self.starts
+
+        for n in range(len(starts) - 1):
+            yield n, content[starts[n]:starts[n + 1] - 1]
+
+    def line(self, n):
+        if not 0 <= n < len(self):
+            raise IndexError(n)
+
+        return self.content[self.starts[n]:self.starts[n + 1] - 1]
+
+
+def get_size(value):
+    """ Approximate size of parse result in bytes.
+    """
+    size = sys.getsizeof(value)
+
+    if isinstance(value, TableResult):
+        size += get_size(value.index) + get_size(value.columns)
+    elif isinstance(value, Mapping):
+        for key, item in value.items():
+            size += sys.getsizeof(key) + get_size(item)
+    elif isinstance(value, list):
+        for item in value:
+            size += get_size(item)
+
+    return size
+
+
+def interpolate(result):
+    """ Replace `${section:key}` references in strings of parse result.
+
+    `$$` is an escaped `$`. References are resolved in topological order
+    of the dependency graph, so every value is substituted once.
+    Columns of tables are substituted as lists of values.
+    """
+    deps = {}
+
+    for section_key, section in result.items():
+        if isinstance(section, TableResult):
+            section = section.columns
+        elif not isinstance(section, Mapping):
             continue
-        elif line and line[0] in '#;':
+
+        for key, value in section.items():
+            refs = _find_references(value)
+            if refs:
+                deps[(section_key, key)] = refs
+
+    for node in _sort_references(deps):
+        section_key, key = node
+        section = result[section_key]
+        if isinstance(section, TableResult):
+            section = section.columns
+
+        section[key] = _substitute(section[key], result, node)
+
+    return result
+
+
+def _find_references(value):
+    if isinstance(value, str):
+        if '$' not in value:
+            return []
+
+        # escaped `$$` is `(None, None)`, it's needed for substitution
+        return [m.groups() for m in RE_REFERENCE.finditer(value)]
+
+    elif isinstance(value, list):
+        refs = []
+        for item in value:
+            refs.extend(_find_references(item))
+
+        return refs
+
+    else:
+        return []
+
+
+def _sort_references(deps):
+    """ Return nodes in order of dependencies, check for cycles.
+    """
+    order = []
+    done = set()
+    visiting = set()
+
+    for start in deps:
+        if start in done:
             continue
-        elif line.startswith('[') and line.endswith(']'):
-            section_key = line[1:-1]
-            break
-        else:
-            raise ParseError(n, line)
+
+        visiting.add(start)
+        stack = [(start, iter(deps[start]))]
+
+        while stack:
+            node, refs = stack[-1]
+
+            for ref in refs:
+                if ref in visiting:
+                    raise InterpolationError(ref[0], ref[1],
+                                             "cycle of references")
+                elif ref in deps and ref not in done:
+                    visiting.add(ref)
+                    stack.append((ref, iter(deps[ref])))
+                    break
+            else:
+                stack.pop()
+                visiting.discard(node)
+                done.add(node)
+                order.append(node)
+
+    return order
+
+
+def _substitute(value, result, node):
+    if isinstance(value, str):
+        if '$' not in value:
+            return value
+
+        def replace(match):
+            section_key, key = match.groups()
+            if section_key is None:
+                return '$'
+
+            try:
+                return str(result[section_key][key])
+            except KeyError:
+                raise InterpolationError(
+                    node[0], node[1],
+                    "unknown reference ${{{}:{}}}".format(section_key, key),
+                ) from None
+
+        return RE_REFERENCE.sub(replace, value)
+
+    elif isinstance(value, list):
+        return [_substitute(item, result, node) for item in value]
+
     else:
-        return
+        return value
+
+
+def make_projection(projection):
+    """ Normalize projection to dict of sections to sets of keys.
+
+    Projection is a dict of section names to lists of keys, or an iterable
+    of `section.key` paths, split by the first dot. `None` instead of keys,
+    or a path without a dot, means all keys of the section.
+    """
+    if projection is None:
+        return None
+    elif isinstance(projection, str):
+        raise TypeError("projection must be an iterable of paths, "
+                        "not a string")
+    elif isinstance(projection, Mapping):
+        items = projection.items()
+    else:
+        items = _group_paths(projection)
+
+    result = {}
+    for section_key, keys in items:
+        if isinstance(keys, str):
+            raise TypeError("keys of section {!r} must be an iterable, "
+                            "not a string".format(section_key))
+
+        result[section_key] = None if keys is None else frozenset(keys)
+
+    return result
+
+
+def _group_paths(paths):
+    groups = {}
+
+    for path in paths:
+        section_key, dot, key = path.partition('.')
+        if not dot:
+            groups[section_key] = None
+        elif section_key not in groups:
+            groups[section_key] = [key]
+        elif groups[section_key] is not None:
+            groups[section_key].append(key)
+
+    return groups.items()
+
+
+def split_line(line):
+    """ Split a key line to the stripped key and value.
+
+    Return `None` for a line without `=`.
+    """
+    key, sep, value = line.partition('=')
+    if not sep:
+        return None
+
+    return KeyValue(key.strip(), value.strip())
+
+
+class SectionToken(list):
+    """ Lines of a section, made by `tokenize_sections`.
+
+    `line_index` is the `LineIndex` of lines, if they are read from it.
+    """
+    __slots__ = ('line_index',)
+
+    def __init__(self, line_index=None):
+        super().__init__()
+        self.line_index = line_index
+
+
+class Token(list):
+    """ Lines of a key, made by `tokenize`.
+
+    The first line is split once to `keyvalue`, it's `None`
+    for a line without `=`. `line_index` is the `LineIndex` of the section.
+    """
+    __slots__ = ('keyvalue', 'line_index')
+
+
+def split_token(token):
+    """ Return `KeyValue` of the first line of token.
+    """
+    try:
+        return token.keyvalue
+    except AttributeError:
+        return split_line(token[0][1])
+
+
+def tokenize_sections(lines, headers=None):
+    """ Split lines to sections, yield `(section_key, section_token)`.
+
+    If `headers` is set, line numbers of headers are stored in it.
+    """
+    index = lines if isinstance(lines, LineIndex) else None
+    section_key = None
+    section_token = SectionToken(index)
 
-    section_token = []
     for n, line in lines:
-        if line and line[0] in '#;':
+        line = line.rstrip()
+        first = line[:1]
+
+        if first == '#' or first == ';':
             continue
-        if line.startswith('[') and line.endswith(']'):
+        elif first == '[' and line[-1] == ']':
             if section_token:
                 yield section_key, section_token
 
             section_key = line[1:-1]
-            section_token = []
-        else:
+            section_token = SectionToken(index)
+
+            if headers is not None:
+                headers[section_key] = n
+        elif section_key is not None:
             section_token.append((n, line))
-    else:
-        if section_token:
-            yield section_key, section_token
+        elif line:
+            raise ParseError(n, line)
+
+    if section_token:
+        yield section_key, section_token
 
 
 def tokenize(lines):
-    lines = lines.copy()
+    line_index = getattr(lines, 'line_index', None)
+    indents = [len(line) - len(line.lstrip(' ')) if line.strip() else None
+               for n, line in lines]
 
-    while lines:
-        n, line = lines.pop(0)
-        if not line.strip():
+    pos = 0
+    count = len(lines)
+
+    while pos < count:
+        token_indent = indents[pos]
+
+        if token_indent is None:
+            pos += 1
             continue
 
-        token_indent = get_indent(line)
-        token = [(n, line)]
+        token = Token([lines[pos]])
+        token.keyvalue = split_line(lines[pos][1])
+        token.line_index = line_index
+        pos += 1
+
+        if pos < count and (indents[pos] or 0) > token_indent:
+            block_indent = indents[pos]
+
+            while pos < count:
+                indent = indents[pos]
 
-        if len(lines) > 1:
-            block_indent = get_indent(lines[0][1])
+                if indent is None:
+                    indent = block_indent
 
-            if block_indent > token_indent:
-                while lines:
-                    n, line = lines[0]
-                    if line.strip():
-                        indent = get_indent(line)
-                    else:
-                        indent = block_indent
+                if indent <= token_indent:
+                    break
+                elif indent < block_indent:
+                    raise ParseError(*lines[pos])
 
-                    if indent <= token_indent:
-                        break
-                    elif token_indent < indent < block_indent:
-                        raise ParseError(n, line)
-                    elif indent >= block_indent:
-                        token.append((n, line))
-                        del lines[0]
-                    else:  # pragma: no cover
-                        raise RuntimeError(n, line)
+                token.append(lines[pos])
+                pos += 1
 
-        if token:
-            yield strip_token(token)
+        yield strip_token(token)
 
 
 def get_key(token):
-    n, line = token[0]
+    keyvalue = split_token(token)
 
-    if '=' in line:
-        return line.split('=', 1)[0].strip()
+    if keyvalue is not None:
+        return keyvalue.key
     else:
-        raise ParseError(n, line)
+        raise ParseError(*token[0])
 
 
 def get_keyvalue(token):
     if not token:  # pragma: no cover
         raise ValueError(token)
 
-    n, line = token[0]
+    keyvalue = split_token(token)
 
-    if '=' not in line:
-        raise ParseError(n, line)
+    if keyvalue is None or not keyvalue.key:
+        raise ParseError(*token[0])
 
-    key, value = (i.strip() for i in line.split('=', 1))
-    if not key:
-        raise ParseError(n, line)
-
-    return KeyValue(key, value)
+    return keyvalue
 
 
 def get_indent(value):
-    if not value:
-        return 0
-
-    for n, char in enumerate(value):
-        if char != ' ':
-            break
-
-    return n
+    return len(value) - len(value.lstrip(' '))
 
 
 def strip_token(token):
@@ -548,3 +2134,181 @@ def strip_token(token):
             break
 
     return token
+
+
+def parse_datetime(value):
+    """ Parse ISO 8601 datetime without dateutil.
+    """
+    match = RE_DATETIME.match(value)
+    if match is None or match.end() != len(value):
+        raise ValueError("bad datetime: {!r}".format(value))
+
+    return make_datetime(match.groups())
+
+
+def parse_datetimes(values, epoch=False):
+    """ Parse list of datetimes with one regex pass over the joined values.
+
+    With `epoch` return microseconds since epoch; naive values are UTC.
+    """
+    make = make_epoch if epoch else make_datetime
+    text = '\n'.join(values)
+    result = []
+    pos = 0
+
+    for match in RE_DATETIME.finditer(text):
+        if match.start() != pos:
+            break
+
+        result.append(make(match.groups()))
+        pos = match.end() + 1
+
+    if len(result) != len(values):
+        raise ValueError("bad datetime: {!r}".format(values[len(result)]))
+
+    return result
+
+
+def get_timezone(minutes):
+    """ Return shared tzinfo for offset in minutes.
+    """
+    tz = _timezones.get(minutes)
+    if tz is None:
+        tz = timezone(timedelta(minutes=minutes))
+        tz = _timezones.setdefault(minutes, tz)
+
+    return tz
+
+
+def _get_offset(sign, tz_hour, tz_minute, zulu):
+    if sign:
+        if zulu:
+            raise ValueError("both offset and Z is set")
+
+        minutes = int(tz_hour) * 60 + int(tz_minute or 0)
+        return -minutes if sign == '-' else minutes
+    elif zulu:
+        return 0
+    else:
+        return None
+
+
+def make_datetime(groups):
+    """ Make datetime from groups of `RE_DATETIME`.
+    """
+    (year, month, day, hour, minute, second, fraction,
+     sign, tz_hour, tz_minute, zulu) = groups
+
+    if hour is None:
+        if zulu:
+            raise ValueError("timezone without time")
+
+        return datetime(int(year), int(month), int(day))
+
+    offset = _get_offset(sign, tz_hour, tz_minute, zulu)
+
+    return datetime(
+        int(year), int(month), int(day),
+        int(hour), int(minute), int(second or 0),
+        int(fraction[:6].ljust(6, '0')) if fraction else 0,
+        None if offset is None else get_timezone(offset),
+    )
+
+
+def check_datetime(groups):
+    """ Check ranges of groups of `RE_DATETIME` without making datetime.
+    """
+    (year, month, day, hour, minute, second, fraction,
+     sign, tz_hour, tz_minute, zulu) = groups
+
+    year, month, day = int(year), int(month), int(day)
+
+    if not (1 <= year and 1 <= month <= 12 and
+            1 <= day <= monthrange(year, month)[1]):
+        raise ValueError("date is out of range")
+
+    if hour is None:
+        if zulu:
+            raise ValueError("timezone without time")
+
+        return
+
+    if int(hour) > 23 or int(minute) > 59 or int(second or 0) > 59:
+        raise ValueError("time is out of range")
+
+    offset = _get_offset(sign, tz_hour, tz_minute, zulu)
+    if offset is not None and abs(offset) >= 1440:
+        raise ValueError("offset is out of range")
+
+
+def make_epoch(groups):
+    """ Make microseconds since epoch from groups of `RE_DATETIME`.
+    """
+    (year, month, day, hour, minute, second, fraction,
+     sign, tz_hour, tz_minute, zulu) = groups
+
+    days = date(int(year), int(month), int(day)).toordinal() - EPOCH_ORDINAL
+
+    if hour is None:
+        if zulu:
+            raise ValueError("timezone without time")
+
+        return days * 86400000000
+
+    hour, minute, second = int(hour), int(minute), int(second or 0)
+    if hour > 23 or minute > 59 or second > 59:
+        raise ValueError("time is out of range")
+
+    offset = _get_offset(sign, tz_hour, tz_minute, zulu) or 0
+    if abs(offset) >= 1440:
+        raise ValueError("offset is out of range")
+
+    seconds = (days * 86400 + hour * 3600 + minute * 60 + second -
+               offset * 60)
+    microsecond = int(fraction[:6].ljust(6, '0')) if fraction else 0
+
+    return seconds * 1000000 + microsecond
+
+
+def parse_timedelta(value):
+    """ Parse duration like `1w2d3h4m5s6ms` in a single scan.
+
+    Units must follow in order `w`, `d`, `h`, `m`, `s`, `ms`
+    and each of them may be used only once.
+    """
+    amounts = [0] * len(TIMEDELTA_UNITS)
+    unit_index = 0
+    length = len(value)
+    pos = 0
+
+    if not length:
+        raise ValueError("empty duration")
+
+    while pos < length:
+        start = pos
+        while pos < length and value[pos].isdecimal():
+            pos += 1
+
+        if pos == start or pos == length:
+            raise ValueError("bad duration: {!r}".format(value))
+
+        number = int(value[start:pos])
+
+        if value.startswith('ms', pos):
+            unit = 'ms'
+        else:
+            unit = value[pos]
+
+        try:
+            index = TIMEDELTA_UNITS.index(unit, unit_index)
+        except ValueError:
+            raise ValueError("bad duration: {!r}".format(value)) from None
+
+        amounts[index] = number
+        unit_index = index + 1
+        pos += len(unit)
+
+    weeks, days, hours, minutes, seconds, milliseconds = amounts
+    return timedelta(days=weeks * 7 + days,
+                     seconds=hours * 3600 + minutes * 60 + seconds,
+                     milliseconds=milliseconds)